@@ -4,6 +4,7 @@ from typing import List, Dict, Optional
 from openai import OpenAI
 import config
 from ai import prompt_templates
+from ai.query_text import create_query_embedding_text
 
 
 class MovieAssistant:
@@ -22,7 +23,7 @@ class MovieAssistant:
         if not self.api_key:
             raise ValueError("OpenAI API key not provided")
         
-        self.client = OpenAI(api_key=self.api_key)
+        self.client = OpenAI(api_key=self.api_key, base_url=config.OPENAI_BASE_URL)
         self.conversation_history: List[Dict] = []
         
         # Initialize with system prompt
@@ -189,34 +190,7 @@ class MovieAssistant:
         Returns:
             Text representation of preferences
         """
-        parts = []
-        
-        if preferences.get('actors'):
-            actors = ', '.join(preferences['actors']) if isinstance(preferences['actors'], list) else preferences['actors']
-            parts.append(f"Актеры: {actors}")
-        
-        if preferences.get('directors'):
-            directors = ', '.join(preferences['directors']) if isinstance(preferences['directors'], list) else preferences['directors']
-            parts.append(f"Режиссеры: {directors}")
-        
-        if preferences.get('genres'):
-            genres = ', '.join(preferences['genres']) if isinstance(preferences['genres'], list) else preferences['genres']
-            parts.append(f"Жанры: {genres}")
-        
-        if preferences.get('mood'):
-            parts.append(f"Настроение: {preferences['mood']}")
-        
-        if preferences.get('themes'):
-            themes = ', '.join(preferences['themes']) if isinstance(preferences['themes'], list) else preferences['themes']
-            parts.append(f"Темы: {themes}")
-        
-        if preferences.get('era'):
-            parts.append(f"Эпоха: {preferences['era']}")
-        
-        if preferences.get('other'):
-            parts.append(f"{preferences['other']}")
-        
-        return ". ".join(parts) if parts else "Фильмы"
+        return create_query_embedding_text(preferences)
     
     def reset_conversation(self):
         """Reset conversation history."""
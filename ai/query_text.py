@@ -0,0 +1,45 @@
+"""Query text for embedding user preferences.
+
+Kept apart from MovieAssistant so building query text does not need the
+OpenAI client (offline providers, benchmarks).
+"""
+from typing import Dict
+
+
+def create_query_embedding_text(preferences: Dict) -> str:
+    """Create text for embedding from user preferences.
+    
+    Args:
+        preferences: Dictionary with user preferences
+        
+    Returns:
+        Text representation of preferences
+    """
+    parts = []
+    
+    if preferences.get('actors'):
+        actors = ', '.join(preferences['actors']) if isinstance(preferences['actors'], list) else preferences['actors']
+        parts.append(f"Актеры: {actors}")
+    
+    if preferences.get('directors'):
+        directors = ', '.join(preferences['directors']) if isinstance(preferences['directors'], list) else preferences['directors']
+        parts.append(f"Режиссеры: {directors}")
+    
+    if preferences.get('genres'):
+        genres = ', '.join(preferences['genres']) if isinstance(preferences['genres'], list) else preferences['genres']
+        parts.append(f"Жанры: {genres}")
+    
+    if preferences.get('mood'):
+        parts.append(f"Настроение: {preferences['mood']}")
+    
+    if preferences.get('themes'):
+        themes = ', '.join(preferences['themes']) if isinstance(preferences['themes'], list) else preferences['themes']
+        parts.append(f"Темы: {themes}")
+    
+    if preferences.get('era'):
+        parts.append(f"Эпоха: {preferences['era']}")
+    
+    if preferences.get('other'):
+        parts.append(f"{preferences['other']}")
+    
+    return ". ".join(parts) if parts else "Фильмы"
@@ -1,21 +1,155 @@
 """Movie catalog loader and manager."""
+import os
+import threading
+import numpy as np
 import pandas as pd
-from typing import List, Dict, Optional
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from typing import Iterator, List, Dict, Optional, Tuple
+from catalog.inverted_index import CatalogIndex
+from catalog.row_store import RowStore
 import config
 
 
+LOAD_MODES = ('full', 'search')
+
+# Catalog column -> label in the embedding text, in text order
+DESCRIPTION_FIELDS = [
+    ('serial_name', 'Название'),
+    ('genres', 'Жанры'),
+    ('director', 'Режиссер'),
+    ('actors', 'Актеры'),
+    ('country', 'Страна'),
+    ('description', 'Описание'),
+]
+
+
+def file_signature(path: str) -> Optional[Tuple[int, int]]:
+    """Get (modification time in ns, size) of a file, or None if it is missing."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _is_filled(value) -> bool:
+    """Check whether a field goes into the description, the way `if movie.get(...)` decides (NaN does)."""
+    return value is not None and bool(value)
+
+
+def _description_values(values) -> pa.Array:
+    """Convert a column to Arrow strings, null where the field is skipped.
+    
+    Missing values are NaN in row dicts, which the per-row builder writes
+    as "nan"; only None (in object columns) and empty strings are skipped.
+    
+    Args:
+        values: pandas Series or Arrow array
+    
+    Returns:
+        Large-string array with the same text f"{value}" gives for filled values
+    """
+    is_arrow = isinstance(values, (pa.Array, pa.ChunkedArray))
+    try:
+        array = values if is_arrow else pa.array(values, from_pandas=True)
+        if pa.types.is_dictionary(array.type):
+            array = array.cast(array.type.value_type)
+        if not (pa.types.is_string(array.type) or pa.types.is_large_string(array.type)):
+            raise TypeError(f"not a text column: {array.type}")
+    except (TypeError, pa.ArrowException):
+        # Numbers or mixed objects: per value, same rules as the per-row builder
+        if is_arrow:
+            objects = [np.nan if value is None else value for value in values.to_pylist()]  # missing is NaN in row dicts
+        else:
+            objects = values.to_numpy(dtype=object)
+        return pa.array([f"{value}" if _is_filled(value) else None for value in objects], type=pa.large_string())
+    
+    array = array.cast(pa.large_string())  # one offset width for every column (and > 2 GB of text)
+    nan = pa.scalar("nan", pa.large_string())
+    if not is_arrow and values.dtype == object:
+        # Object columns keep None apart from NaN: only NaN is written
+        objects = values.to_numpy(dtype=object)
+        array = pc.if_else(pa.array(pd.isna(objects) & np.not_equal(objects, None)), nan, array)
+    else:
+        array = pc.fill_null(array, nan)
+    return pc.if_else(pc.equal(array, ""), pa.scalar(None, pa.large_string()), array)
+
+
+def _arrow_string_dtype():
+    """Get Arrow-backed string dtype with NaN for missing values, or None.
+    
+    NaN keeps the semantics of the object columns the code was written
+    for (pd.NA would make `if movie.get(...)` raise).
+    """
+    for kwargs in ({'storage': 'pyarrow', 'na_value': np.nan}, {'storage': 'pyarrow_numpy'}):
+        try:
+            return pd.StringDtype(**kwargs)
+        except (TypeError, ValueError, ImportError):
+            continue
+    return None
+
+
+def _string_types_mapper():
+    """Get types_mapper for Table.to_pandas turning Arrow text into Arrow-backed strings."""
+    string_dtype = _arrow_string_dtype()
+    
+    def types_mapper(arrow_type):
+        if string_dtype is not None and (pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type)):
+            return string_dtype
+        return None
+    return types_mapper
+
+
 class CatalogLoader:
     """Manages loading and querying the Okko movie catalog."""
     
-    def __init__(self, catalog_path: str = None):
+    def __init__(self, catalog_path: str = None, mode: str = None):
         """Initialize catalog loader.
         
         Args:
             catalog_path: Path to the parquet catalog file
+            mode: 'full' - every column in memory; 'search' - heavy text
+                columns (config.CATALOG_LAZY_COLUMNS) are read on demand
+                (defaults to config.CATALOG_LOAD_MODE)
         """
         self.catalog_path = catalog_path or config.CATALOG_PATH
+        self.mode = mode or config.CATALOG_LOAD_MODE
         self.df: Optional[pd.DataFrame] = None
+        self._index: Optional[CatalogIndex] = None  # built for self._index.df
+        self._rows: Optional[RowStore] = None  # built for self._rows.df
+        
+        if self.mode not in LOAD_MODES:
+            raise ValueError(f"Unknown catalog load mode: {self.mode}")
+        
+        self.lazy_columns: List[str] = []  # columns left in the file, see get_lazy_values
+        self._file_columns: List[str] = []  # every column, in file order
+        self._lazy_values: Dict[str, pa.ChunkedArray] = {}  # column -> values read on demand
+        self.source: Optional[Tuple[int, int]] = None  # file_signature of the file load_catalog read
+        self._lazy_source = None  # that file, kept open while lazy columns are unread
+        self._lazy_lock = threading.Lock()
+    
+    @property
+    def index(self) -> CatalogIndex:
+        """Name indexes of the current catalog (rebuilt if self.df was replaced)."""
+        if self.df is None:
+            raise ValueError("Catalog not loaded")
         
+        if self._index is None or self._index.df is not self.df:
+            self._index = CatalogIndex(self.df)
+        return self._index
+    
+    @property
+    def rows(self) -> RowStore:
+        """Row store of the current catalog (rebuilt if self.df was replaced)."""
+        if self.df is None:
+            raise ValueError("Catalog not loaded")
+        
+        if self._rows is None or self._rows.df is not self.df:
+            self._rows = RowStore(self.df)
+        return self._rows
+    
     def load_catalog(self) -> pd.DataFrame:
         """Load the movie catalog from parquet file.
         
@@ -23,8 +157,14 @@ class CatalogLoader:
             DataFrame with movie catalog
         """
         try:
-            self.df = pd.read_parquet(self.catalog_path)
-            print(f"[+] Catalog loaded: {len(self.df)} movies")
+            self.df = self._read_columns()
+            self._rows = RowStore(self.df)
+            memory_mb = self.df.memory_usage(deep=True).sum() / 2**20
+            lazy = f", lazy: {', '.join(self.lazy_columns)}" if self.lazy_columns else ""
+            print(f"[+] Catalog loaded: {len(self.df)} movies ({memory_mb:.1f} MB{lazy})")
+            
+            stats = self.index.stats()
+            print("[+] Catalog index: " + ", ".join(f"{count} {column}" for column, count in stats.items()))
             return self.df
         except FileNotFoundError:
             print(f"[!] Error: Catalog file not found at {self.catalog_path}")
@@ -33,6 +173,163 @@ class CatalogLoader:
             print(f"[!] Error loading catalog: {e}")
             raise
     
+    def _read_columns(self) -> pd.DataFrame:
+        """Read the columns of the load mode with compact dtypes.
+        
+        Text columns become Arrow-backed strings; low-cardinality ones
+        (country, genre combinations, ...) become categoricals.
+        
+        With lazy columns the file stays open: they are read later through
+        the same handle, so they come from the file the DataFrame was read
+        from even if the catalog path has been replaced since.
+        
+        Returns:
+            Catalog DataFrame
+        """
+        self._close_lazy_source()
+        source = open(self.catalog_path, 'rb')
+        try:
+            names = pq.read_schema(source).names
+            self.lazy_columns = [c for c in config.CATALOG_LAZY_COLUMNS if self.mode == 'search' and c in names]
+            self._lazy_values.clear()
+            self._file_columns = [c for c in names if not c.startswith('__index_level_')]
+            columns = [c for c in self._file_columns if c not in self.lazy_columns]
+            
+            # Index columns come from the pandas metadata, whatever the projection
+            source.seek(0)
+            table = pq.read_table(source, columns=columns, use_pandas_metadata=True)
+        except BaseException:
+            source.close()
+            raise
+        
+        stat = os.fstat(source.fileno())
+        self.source = (stat.st_mtime_ns, stat.st_size)
+        if self.lazy_columns:
+            self._lazy_source = source
+        else:
+            source.close()
+        
+        df = table.to_pandas(types_mapper=_string_types_mapper())
+        
+        for column in df.columns:
+            if (pd.api.types.is_string_dtype(df[column]) and len(df) > 0
+                    and df[column].nunique() / len(df) < config.CATALOG_CATEGORY_MAX_SHARE):
+                df[column] = df[column].astype('category')
+        
+        return df
+    
+    def iter_batches(self, batch_rows: int = None, columns: List[str] = None) -> Iterator[pd.DataFrame]:
+        """Stream the catalog file in record batches without loading it whole.
+        
+        Only one batch is in memory at a time, so a catalog that does not
+        fit in the worker can still be processed (see
+        RecommendationEngine.refresh_embeddings). Batches carry the same
+        movie indices as load_catalog gives.
+        
+        Args:
+            batch_rows: Rows per batch (defaults to config.CATALOG_STREAM_BATCH_ROWS)
+            columns: Columns to read (defaults to those the embedding text needs)
+        
+        Yields:
+            Catalog DataFrame chunks, in file order
+        """
+        parquet = pq.ParquetFile(self.catalog_path)
+        schema = parquet.schema_arrow
+        
+        # The movie index is either stored as columns or described as a range in the pandas metadata
+        index_columns = (schema.pandas_metadata or {}).get('index_columns', [])
+        stored_index = [c for c in index_columns if isinstance(c, str)]
+        range_index = next((c for c in index_columns if isinstance(c, dict) and c.get('kind') == 'range'), None)
+        
+        if columns is None:
+            columns = [column for column, _ in DESCRIPTION_FIELDS if column in schema.names]
+        read = list(columns) + [c for c in stored_index if c not in columns]
+        
+        types_mapper = _string_types_mapper()
+        offset = 0
+        for batch in parquet.iter_batches(batch_size=batch_rows or config.CATALOG_STREAM_BATCH_ROWS, columns=read):
+            chunk = pa.Table.from_batches([batch]).to_pandas(types_mapper=types_mapper, ignore_metadata=True)
+            
+            if stored_index:
+                chunk = chunk.set_index(stored_index)
+                chunk.index.names = [None if name.startswith('__index_level_') else name for name in stored_index]
+            else:
+                start, step = (range_index['start'], range_index['step']) if range_index else (0, 1)
+                chunk.index = pd.RangeIndex(start + step * offset, start + step * (offset + len(chunk)), step,
+                                            name=range_index.get('name') if range_index else None)
+            
+            offset += len(chunk)
+            yield chunk
+    
+    def get_lazy_values(self, column: str, indices: List[int]) -> List:
+        """Get values of a column that is not held in the DataFrame.
+        
+        The column is read from the parquet file on first use and kept
+        as an Arrow array (contiguous buffers, no Python objects).
+        
+        Args:
+            column: Column name (one of self.lazy_columns)
+            indices: DataFrame indices
+        
+        Returns:
+            Values in order of indices (NaN where missing, like a loaded column)
+        """
+        positions = [self.rows.position(idx) for idx in indices]
+        values = self._lazy_array(column, [pos or 0 for pos in positions]).to_pylist()
+        return [np.nan if pos is None or value is None else value for pos, value in zip(positions, values)]
+    
+    def _lazy_array(self, column: str, positions) -> pa.ChunkedArray:
+        """Get values of a lazy column at row positions, as Arrow.
+        
+        Args:
+            column: Column name (one of self.lazy_columns)
+            positions: Row positions
+        
+        Returns:
+            Values (null where missing)
+        """
+        with self._lazy_lock:
+            if column not in self._lazy_values:
+                self._lazy_values[column] = self._read_lazy_column(column)
+        return self._lazy_values[column].take(pa.array(positions, type=pa.int64()))
+    
+    def _read_lazy_column(self, column: str) -> pa.ChunkedArray:
+        """Read a lazy column from the file the catalog was loaded from.
+        
+        A file replaced by a new one (rename) is still read through the
+        handle opened at load time. A file rewritten in place no longer
+        matches the loaded rows, so reading it is refused.
+        
+        Args:
+            column: Column name (one of self.lazy_columns)
+        
+        Returns:
+            Column values
+        """
+        source = self._lazy_source
+        if source is None:
+            raise ValueError(f"Column '{column}' is not a lazy column of the loaded catalog")
+        
+        stat = os.fstat(source.fileno())
+        if (stat.st_mtime_ns, stat.st_size) != self.source:
+            raise ValueError(
+                f"Catalog file {self.catalog_path} was modified after loading; "
+                f"reload the catalog to read '{column}'"
+            )
+        
+        source.seek(0)
+        values = pq.read_table(source, columns=[column]).column(column)
+        
+        if all(c in self._lazy_values or c == column for c in self.lazy_columns):
+            self._close_lazy_source()  # nothing left to read
+        return values
+    
+    def _close_lazy_source(self):
+        """Close the file kept open for lazy columns."""
+        if self._lazy_source is not None:
+            self._lazy_source.close()
+            self._lazy_source = None
+    
     def get_catalog_info(self) -> Dict:
         """Get information about the catalog.
         
@@ -75,8 +372,8 @@ class CatalogLoader:
         if self.df is None:
             raise ValueError("Catalog not loaded")
         
-        mask = self.df['actors'].str.contains(actor_name, case=False, na=False)
-        return self.df[mask].head(limit)
+        rows = self.index.rows('actors', actor_name)
+        return self.df.iloc[rows[:limit]]
     
     def search_by_director(self, director_name: str, limit: int = 50) -> pd.DataFrame:
         """Search movies by director name.
@@ -91,8 +388,8 @@ class CatalogLoader:
         if self.df is None:
             raise ValueError("Catalog not loaded")
         
-        mask = self.df['director'].str.contains(director_name, case=False, na=False)
-        return self.df[mask].head(limit)
+        rows = self.index.rows('director', director_name)
+        return self.df.iloc[rows[:limit]]
     
     def search_by_genre(self, genre: str, limit: int = 50) -> pd.DataFrame:
         """Search movies by genre.
@@ -107,8 +404,8 @@ class CatalogLoader:
         if self.df is None:
             raise ValueError("Catalog not loaded")
         
-        mask = self.df['genres'].str.contains(genre, case=False, na=False)
-        return self.df[mask].head(limit)
+        rows = self.index.rows('genres', genre)
+        return self.df.iloc[rows[:limit]]
     
     def filter_by_age_rating(self, max_age_rating: float) -> pd.DataFrame:
         """Filter movies by age rating.
@@ -140,10 +437,34 @@ class CatalogLoader:
         if self.df is None:
             raise ValueError("Catalog not loaded")
         
-        if index not in self.df.index:
-            return None
+        return self.get_movies([index])[0]
+    
+    def get_movies(self, indices: List[int]) -> List[Optional[Dict]]:
+        """Get details of many movies at once.
+        
+        One column-wise read for the whole batch; use this instead of
+        get_movie_by_index in loops.
+        
+        Args:
+            indices: DataFrame indices
+            
+        Returns:
+            Dictionaries with movie details in input order (None for unknown indices)
+        """
+        if self.df is None:
+            raise ValueError("Catalog not loaded")
         
-        return self.df.loc[index].to_dict()
+        indices = list(indices)
+        movies = self.rows.get_movies(indices)
+        
+        for column in self.lazy_columns:
+            known = [idx for idx, movie in zip(indices, movies) if movie is not None]
+            values = iter(self.get_lazy_values(column, known))
+            for movie in movies:
+                if movie is not None:
+                    movie[column] = next(values)
+        
+        return movies
     
     def get_movies_by_indices(self, indices: List[int]) -> pd.DataFrame:
         """Get multiple movies by their indices.
@@ -157,7 +478,11 @@ class CatalogLoader:
         if self.df is None:
             raise ValueError("Catalog not loaded")
         
-        return self.df.loc[indices]
+        movies = self.df.loc[indices]
+        if self.lazy_columns:
+            movies = movies.assign(**{column: self.get_lazy_values(column, indices) for column in self.lazy_columns})
+            movies = movies[[c for c in self._file_columns if c in movies.columns]]
+        return movies
     
     def create_movie_description(self, movie: Dict) -> str:
         """Create a text description of a movie for embeddings.
@@ -169,26 +494,53 @@ class CatalogLoader:
             Text description
         """
         parts = []
+        for column, label in DESCRIPTION_FIELDS:
+            value = movie.get(column)
+            if _is_filled(value):
+                parts.append(f"{label}: {value}")
         
-        if movie.get('serial_name'):
-            parts.append(f"Название: {movie['serial_name']}")
-        
-        if movie.get('genres'):
-            parts.append(f"Жанры: {movie['genres']}")
+        return ". ".join(parts)
+    
+    def create_movie_descriptions(self, df: pd.DataFrame = None) -> List[str]:
+        """Create descriptions for many movies with column-wise string ops.
         
-        if movie.get('director'):
-            parts.append(f"Режиссер: {movie['director']}")
+        Gives exactly what create_movie_description gives per row, so
+        content hashes of cached embeddings stay valid.
         
-        if movie.get('actors'):
-            parts.append(f"Актеры: {movie['actors']}")
+        Args:
+            df: Catalog rows (defaults to the whole catalog); lazy columns
+                are read from the file for these rows
+            
+        Returns:
+            Text descriptions, row-aligned with df
+        """
+        df = self.df if df is None else df
+        if len(df) == 0:
+            return []
         
-        if movie.get('country'):
-            parts.append(f"Страна: {movie['country']}")
+        empty = pa.scalar("", pa.large_string())
+        pieces = []
+        for column, label in DESCRIPTION_FIELDS:
+            if column in df.columns:
+                values = _description_values(df[column])
+            elif column in self.lazy_columns:
+                positions = [self.rows.position(idx) for idx in df.index]
+                values = _description_values(self._lazy_array(column, positions))
+            else:
+                continue
+            
+            # ". Label: value", or "" for a skipped field (null stays null through the join)
+            prefix = pa.scalar(f". {label}: ", pa.large_string())
+            piece = pc.binary_join_element_wise(prefix, values, empty)
+            pieces.append(pc.fill_null(piece, empty))
         
-        if movie.get('description'):
-            parts.append(f"Описание: {movie['description']}")
+        if not pieces:
+            return [""] * len(df)
         
-        return ". ".join(parts)
+        # Drop the leading ". " of the first filled field; empty rows stay empty.
+        # (null_handling='skip' would do this in one call, but loses all-null rows in some pyarrow versions)
+        joined = pc.binary_join_element_wise(*pieces, empty)
+        return pc.utf8_slice_codeunits(joined, 2).to_pylist()
     
     def get_random_movies(self, n: int = 10) -> pd.DataFrame:
         """Get random movies from catalog.
@@ -0,0 +1,134 @@
+"""Trigram index for fuzzy lookups of actor and director names."""
+import re
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Set, Tuple
+
+
+# Cyrillic -> Latin, so "Гослинг" and "Gosling" share trigrams
+_CYRILLIC = {
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ё': 'e', 'ж': 'zh', 'з': 'z',
+    'и': 'i', 'й': 'i', 'к': 'k', 'л': 'l', 'м': 'm', 'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r',
+    'с': 's', 'т': 't', 'у': 'u', 'ф': 'f', 'х': 'h', 'ц': 'ts', 'ч': 'ch', 'ш': 'sh', 'щ': 'sch',
+    'ъ': '', 'ы': 'i', 'ь': '', 'э': 'e', 'ю': 'yu', 'я': 'ya',
+}
+_TRANSLIT = str.maketrans(_CYRILLIC)
+
+# Spellings the two alphabets render differently (applied to the Latin form, in order)
+_FOLDS = [
+    (re.compile(r'ph'), 'f'),
+    (re.compile(r'ck|q'), 'k'),
+    (re.compile(r'ch(?=[rl])'), 'k'),  # Christopher, Chloe
+    (re.compile(r'c(?!h)'), 'k'),
+    (re.compile(r'x'), 'ks'),
+    (re.compile(r'w'), 'v'),
+    (re.compile(r'j'), 'dzh'),
+    (re.compile(r'ee'), 'i'),
+    (re.compile(r'oo'), 'u'),
+    (re.compile(r'y'), 'i'),
+    (re.compile(r'([a-z])\1+'), r'\1'),  # doubled letters
+    (re.compile(r'[^a-z]+'), ' '),
+]
+
+
+def name_key(name: str) -> str:
+    """Reduce a name to the Latin form trigrams are taken from.
+    
+    Lowercases, transliterates Cyrillic and folds spellings that differ
+    between transliterations ("Райан Гослинг" and "Ryan Gosling" become
+    "raian gosling" and "rian gosling").
+    
+    Args:
+        name: Name in any case, Cyrillic or Latin
+    
+    Returns:
+        Space-separated words of a-z
+    """
+    key = name.lower().translate(_TRANSLIT)
+    for pattern, replacement in _FOLDS:
+        key = pattern.sub(replacement, key)
+    return key.strip()
+
+
+def trigrams(key: str) -> Set[str]:
+    """Get trigrams of a name key, each word padded like pg_trgm ("  w", " wo", ..., "rd ").
+    
+    Args:
+        key: Name key (see name_key)
+    
+    Returns:
+        Set of trigrams
+    """
+    grams = set()
+    for word in key.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class FuzzyNameIndex:
+    """Trigram postings over a vocabulary of distinct names.
+    
+    A query is scored against every name sharing a trigram with it using
+    one bincount over the trigrams' postings, so lookups touch only
+    candidate names and stay well under a millisecond for catalog-sized
+    vocabularies. The score averages how much of the query is found in
+    the name with how similar the two are overall (Dice coefficient).
+    """
+    
+    def __init__(self, names: List[str]):
+        """Build index.
+        
+        Args:
+            names: Distinct names; matches refer to positions in this list
+        """
+        self.names = names
+        
+        grams_of_names = [trigrams(name_key(name)) for name in names]
+        self.gram_counts = np.fromiter(map(len, grams_of_names), dtype=np.int64, count=len(names))
+        codes, uniques = pd.factorize(np.asarray([gram for grams in grams_of_names for gram in grams], dtype=object))
+        name_ids = np.repeat(np.arange(len(names), dtype=np.int32), self.gram_counts)
+        
+        # CSR postings: names with trigram g are postings[offsets[g]:offsets[g + 1]]
+        self.postings = name_ids[np.argsort(codes, kind='stable')]
+        self.offsets = np.zeros(len(uniques) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(codes, minlength=len(uniques)), out=self.offsets[1:])
+        self._gram_ids: Dict[str, int] = {gram: code for code, gram in enumerate(uniques)}
+    
+    def __len__(self) -> int:
+        return len(self.names)
+    
+    def match(self, query: str, limit: int = 5, min_score: float = 0.5) -> List[Tuple[int, float]]:
+        """Find names most similar to the query.
+        
+        Args:
+            query: Name as the user typed it
+            limit: Maximum number of matches
+            min_score: Lowest score to return (0..1)
+        
+        Returns:
+            List of (name id, score) tuples, best first
+        """
+        query_grams = trigrams(name_key(query))
+        grams = [self._gram_ids[gram] for gram in query_grams if gram in self._gram_ids]
+        if not grams:
+            return []
+        query_size = len(query_grams)
+        
+        # A name sharing s trigrams scores at most (s/q + 2s/(q+s)) / 2: skip names that cannot reach min_score
+        min_shared = next((s for s in range(1, query_size + 1)
+                           if (s / query_size + 2 * s / (query_size + s)) / 2 >= min_score), query_size + 1)
+        
+        candidates = np.concatenate([self.postings[self.offsets[g]:self.offsets[g + 1]] for g in grams])
+        shared = np.bincount(candidates)
+        name_ids = np.flatnonzero(shared >= min_shared)
+        shared = shared[name_ids]
+        
+        coverage = shared / query_size
+        dice = 2 * shared / (query_size + self.gram_counts[name_ids])
+        scores = (coverage + dice) / 2
+        
+        keep = scores >= min_score
+        name_ids, scores = name_ids[keep], scores[keep]
+        order = np.lexsort((name_ids, -scores))[:limit]
+        return [(int(name_ids[i]), float(scores[i])) for i in order]
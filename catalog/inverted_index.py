@@ -0,0 +1,256 @@
+"""Inverted indexes over the comma-separated name columns of the catalog."""
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, List, Optional, Tuple
+from catalog.fuzzy_names import FuzzyNameIndex
+import config
+
+
+# Columns holding comma-separated names
+INDEXED_COLUMNS = ('actors', 'director', 'genres')
+
+# Columns of person names, where a missed lookup falls back to fuzzy matching
+FUZZY_COLUMNS = ('actors', 'director')
+
+# Queries with these characters mean something else as a regex: answered by a scan
+_REGEX_SPECIAL = frozenset('.^$*+?{}[]\\|()')
+
+
+def normalize_name(name: str) -> str:
+    """Normalize a name for index lookups (trimmed, lowercase)."""
+    return name.strip().lower()
+
+
+def union_rows(chunks: List[np.ndarray], n_rows: int) -> np.ndarray:
+    """Union of sorted row position arrays.
+    
+    Args:
+        chunks: Row position arrays
+        n_rows: Number of catalog rows
+    
+    Returns:
+        Sorted unique row positions
+    """
+    if not chunks:
+        return np.empty(0, dtype=np.int64)
+    if len(chunks) == 1:
+        return chunks[0]
+    
+    # A row bitmap is cheaper than sorting the concatenation for big unions
+    mask = np.zeros(n_rows, dtype=bool)
+    for rows in chunks:
+        mask[rows] = True
+    return np.flatnonzero(mask)
+
+
+class NameIndex:
+    """Distinct names of one column -> sorted row positions.
+    
+    Postings are stored CSR-style: rows of name i are
+    positions[offsets[i]:offsets[i + 1]], ascending. Substring queries are
+    answered by searching the (much smaller) vocabulary of distinct names
+    instead of every row.
+    """
+    
+    def __init__(self, column: pd.Series):
+        """Build index from a column of comma-separated names.
+        
+        Args:
+            column: Catalog column (missing and non-string values are skipped)
+        """
+        values = pd.Series(column.to_numpy(dtype=object), dtype=object)  # index = row position
+        
+        names = values.str.lower().str.split(',').explode().str.strip()
+        names = names[names.notna() & (names != '')]
+        
+        codes, uniques = pd.factorize(names.to_numpy(dtype=object))
+        rows = names.index.to_numpy(dtype=np.int64)
+        
+        # Sort by (name, row) and drop a name repeated within one row
+        order = np.lexsort((rows, codes))
+        codes, rows = codes[order], rows[order]
+        keep = np.ones(len(codes), dtype=bool)
+        keep[1:] = (codes[1:] != codes[:-1]) | (rows[1:] != rows[:-1])
+        codes, rows = codes[keep], rows[keep]
+        
+        self.n_rows = len(values)
+        self.names: List[str] = list(uniques)
+        self.positions = rows
+        self.offsets = np.zeros(len(self.names) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(codes, minlength=len(self.names)), out=self.offsets[1:])
+        
+        self._code_by_name: Dict[str, int] = {name: code for code, name in enumerate(self.names)}
+        
+        # All names in one string, so a substring search runs in C
+        self._vocabulary = '\n' + '\n'.join(self.names) + '\n'
+        self._starts = np.cumsum([1] + [len(name) + 1 for name in self.names[:-1]]) if self.names else np.empty(0)
+    
+    def __len__(self) -> int:
+        return len(self.names)
+    
+    def rows_for_codes(self, codes: Iterable[int]) -> np.ndarray:
+        """Get sorted row positions of any of the given names.
+        
+        Args:
+            codes: Name ids (positions in self.names)
+        
+        Returns:
+            Sorted unique row positions
+        """
+        chunks = [self.positions[self.offsets[code]:self.offsets[code + 1]] for code in codes]
+        return union_rows(chunks, self.n_rows)
+    
+    def exact(self, name: str) -> np.ndarray:
+        """Get rows listing exactly this name (case-insensitive).
+        
+        Args:
+            name: Name to look up
+        
+        Returns:
+            Sorted row positions
+        """
+        code = self._code_by_name.get(normalize_name(name))
+        return self.rows_for_codes([] if code is None else [code])
+    
+    def containing(self, fragment: str) -> List[int]:
+        """Find names containing a fragment.
+        
+        Args:
+            fragment: Lowercase text without commas or newlines
+        
+        Returns:
+            Name ids, ascending
+        """
+        codes = []
+        start = self._vocabulary.find(fragment)
+        while start != -1:
+            code = int(np.searchsorted(self._starts, start, side='right')) - 1
+            codes.append(code)
+            # Continue from the next name: one hit per name is enough
+            next_start = self._starts[code + 1] if code + 1 < len(self._starts) else len(self._vocabulary)
+            start = self._vocabulary.find(fragment, next_start)
+        return codes
+    
+    def rows_containing(self, fragment: str) -> Optional[np.ndarray]:
+        """Get rows where some name contains a fragment.
+        
+        Matches what df[col].str.contains(fragment, case=False) returns,
+        as long as the fragment cannot match across the ', ' separators
+        or as a regex. Otherwise returns None and the caller scans.
+        
+        Args:
+            fragment: Search text
+        
+        Returns:
+            Sorted row positions, or None if the index cannot answer
+        """
+        if (not fragment or fragment != fragment.strip() or ',' in fragment or '\n' in fragment
+                or not _REGEX_SPECIAL.isdisjoint(fragment)):
+            return None
+        
+        return self.rows_for_codes(self.containing(fragment.lower()))
+
+
+class CatalogIndex:
+    """Name indexes over the actors / director / genres columns of a catalog.
+    
+    Built once per catalog DataFrame; lookups return sorted row positions
+    (use df.iloc), so multi-name queries are unions and combined filters
+    are intersections of small arrays instead of full-column scans.
+    """
+    
+    def __init__(self, df: pd.DataFrame):
+        """Build indexes for every indexed column present in the catalog.
+        
+        Args:
+            df: Catalog DataFrame
+        """
+        self.df = df
+        self.columns: Dict[str, NameIndex] = {
+            column: NameIndex(df[column]) for column in INDEXED_COLUMNS if column in df.columns
+        }
+        self._fuzzy: Dict[str, FuzzyNameIndex] = {}  # built on first fuzzy lookup
+    
+    def rows(self, column: str, query: str, fuzzy: bool = False) -> np.ndarray:
+        """Get rows whose column contains the query, like str.contains(case=False).
+        
+        Args:
+            column: Catalog column
+            query: Name or name fragment
+            fuzzy: If nothing contains the query, use the rows of the
+                closest names instead (typos, other transliteration; see
+                fuzzy_names). Only for FUZZY_COLUMNS
+        
+        Returns:
+            Sorted row positions
+        """
+        index = self.columns.get(column)
+        found = None if index is None else index.rows_containing(query)
+        
+        if found is None:
+            # Regex-like or separator-spanning query: exact semantics of the original scan
+            mask = self.df[column].str.contains(query, case=False, na=False)
+            found = np.flatnonzero(mask.to_numpy(dtype=bool))
+        
+        if fuzzy and len(found) == 0 and index is not None:
+            matches = self._fuzzy_codes(column, query)
+            # Every name as close as the best one: namesakes are equally likely
+            found = index.rows_for_codes(code for code, score in matches if score >= matches[0][1] - 1e-9)
+        
+        return found
+    
+    def rows_any(self, column: str, queries: Iterable[str], fuzzy: bool = False) -> np.ndarray:
+        """Get rows matching any of the queries.
+        
+        Args:
+            column: Catalog column
+            queries: Names or name fragments
+            fuzzy: Fall back to the closest names per query (see rows)
+        
+        Returns:
+            Sorted unique row positions
+        """
+        return union_rows([self.rows(column, query, fuzzy) for query in queries], len(self.df))
+    
+    def fuzzy_names(self, column: str, query: str, limit: int = 5) -> List[Tuple[str, float]]:
+        """Find catalog names closest to a possibly misspelled or transliterated one.
+        
+        Args:
+            column: Name column (one of FUZZY_COLUMNS)
+            query: Name as the user typed it
+            limit: Maximum number of matches
+        
+        Returns:
+            List of (lowercase catalog name, score) tuples, best first;
+            scores below config.FUZZY_NAME_MIN_SCORE are dropped
+        """
+        return [(self.columns[column].names[code], score) for code, score in self._fuzzy_codes(column, query, limit)]
+    
+    def fuzzy_index(self, column: str) -> Optional[FuzzyNameIndex]:
+        """Get trigram index over a name column's distinct names (built on first use).
+        
+        Args:
+            column: Catalog column
+        
+        Returns:
+            Index whose name ids are the column's NameIndex codes, or None
+            if the column is not fuzzy-searchable
+        """
+        index = self.columns.get(column)
+        if index is None or column not in FUZZY_COLUMNS:
+            return None
+        
+        if column not in self._fuzzy:
+            self._fuzzy[column] = FuzzyNameIndex(index.names)
+        return self._fuzzy[column]
+    
+    def _fuzzy_codes(self, column: str, query: str, limit: int = 5) -> List[Tuple[int, float]]:
+        """Fuzzy matches as (name id in the column's NameIndex, score), best first."""
+        fuzzy = self.fuzzy_index(column)
+        if fuzzy is None:
+            return []
+        return fuzzy.match(query, limit=limit, min_score=config.FUZZY_NAME_MIN_SCORE)
+    
+    def stats(self) -> Dict[str, int]:
+        """Get number of distinct names per indexed column."""
+        return {column: len(index) for column, index in self.columns.items()}
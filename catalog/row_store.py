@@ -0,0 +1,87 @@
+"""Column-wise row store for fast access to catalog records by movie index."""
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from typing import Callable, Dict, Iterable, List, Optional
+
+
+def _column_reader(series: pd.Series) -> Callable[[np.ndarray], List]:
+    """Build a function reading column values at row positions.
+    
+    Values come back as df.loc[index].to_dict() would give them (NaN for
+    missing text), without materializing a Python object per row of the
+    whole column.
+    
+    Args:
+        series: Catalog column
+    
+    Returns:
+        Function positions -> list of values
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes = series.cat.codes.to_numpy()
+        categories = np.append(series.cat.categories.to_numpy(dtype=object), np.nan)  # code -1 -> NaN
+        return lambda positions: categories[codes[positions]].tolist()
+    
+    if pd.api.types.is_string_dtype(series.dtype) and hasattr(series.array, '__arrow_array__'):
+        values = pa.chunked_array(series.array.__arrow_array__()).combine_chunks()
+        na_value = getattr(series.dtype, 'na_value', np.nan)
+        
+        def read_arrow(positions: np.ndarray) -> List:
+            taken = values.take(pa.array(positions, type=pa.int64())).to_pylist()
+            return [na_value if value is None else value for value in taken]
+        return read_arrow
+    
+    values = series.to_numpy()
+    return lambda positions: values[positions].tolist()
+
+
+class RowStore:
+    """Catalog rows addressable by movie index in O(1).
+    
+    Struct-of-arrays over the DataFrame's own column buffers: a dict maps
+    movie index -> row position, and each column has a reader that takes
+    many positions at once. A batch of records costs one take per column
+    instead of a pandas Series per row.
+    """
+    
+    def __init__(self, df: pd.DataFrame):
+        """Build store over a catalog DataFrame (no copy of the text data).
+        
+        Args:
+            df: Catalog DataFrame
+        """
+        self.df = df
+        self.columns: List[str] = list(df.columns)
+        self._position: Dict[int, int] = {idx: pos for pos, idx in enumerate(df.index.tolist())}
+        self._readers = [_column_reader(df[column]) for column in self.columns]
+    
+    def __len__(self) -> int:
+        return len(self._position)
+    
+    def __contains__(self, movie_index: int) -> bool:
+        return movie_index in self._position
+    
+    def position(self, movie_index: int) -> Optional[int]:
+        """Get row position of a movie, or None if it is not in the catalog."""
+        return self._position.get(movie_index)
+    
+    def get_movies(self, movie_indices: Iterable[int]) -> List[Optional[Dict]]:
+        """Get records for many movies.
+        
+        Args:
+            movie_indices: Movie indices
+        
+        Returns:
+            Column -> value dicts in input order (None for unknown indices)
+        """
+        positions = [self._position.get(idx) for idx in movie_indices]
+        found = [pos for pos in positions if pos is not None]
+        if not found:
+            return [None] * len(positions)
+        
+        rows = np.asarray(found, dtype=np.int64)
+        columns = [read(rows) for read in self._readers]
+        records = iter([dict(zip(self.columns, values)) for values in zip(*columns)])
+        
+        return [None if pos is None else next(records) for pos in positions]
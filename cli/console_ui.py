@@ -2,20 +2,26 @@
 from typing import Dict, List, Optional
 import config
 from catalog.catalog_loader import CatalogLoader
+from recommender.recommendation_engine import RecommendationEngine
 
 
 class ConsoleUI:
     """Console user interface for the movie assistant."""
     
-    def __init__(self, catalog: CatalogLoader):
+    def __init__(self, engine: RecommendationEngine):
         """Initialize console UI.
         
         Args:
-            catalog: Catalog loader instance
+            engine: Recommendation engine (movies are shown from its live catalog snapshot)
         """
-        self.catalog = catalog
+        self.engine = engine
         self.width = config.CONSOLE_WIDTH
     
+    @property
+    def catalog(self) -> CatalogLoader:
+        """Catalog of the engine's current snapshot (follows hot reloads)."""
+        return self.engine.catalog
+    
     def print_header(self, text: str):
         """Print a header."""
         print("\n" + "=" * self.width)
@@ -96,8 +102,7 @@ class ConsoleUI:
         self.print_separator()
         print(f"\n{title}:\n")
         
-        for i, idx in enumerate(movie_indices, 1):
-            movie = self.catalog.get_movie_by_index(idx)
+        for i, movie in enumerate(self.catalog.get_movies(movie_indices), 1):
             if movie:
                 self._print_movie_short(i, movie)
         
@@ -157,8 +162,7 @@ class ConsoleUI:
         print("  👎 - не нравится (введите '-' или 'dislike')")
         print("  ⏭️  - пропустить (нажмите Enter)\n")
         
-        for idx in movie_indices:
-            movie = self.catalog.get_movie_by_index(idx)
+        for idx, movie in zip(movie_indices, self.catalog.get_movies(movie_indices)):
             if not movie:
                 continue
             
@@ -205,24 +209,21 @@ class ConsoleUI:
         if user1_movies:
             print(f"\n🎬 Специально для {user1_name} (30%):")
             print()
-            for i, idx in enumerate(user1_movies, 1):
-                movie = self.catalog.get_movie_by_index(idx)
+            for i, movie in enumerate(self.catalog.get_movies(user1_movies), 1):
                 if movie:
                     self._print_movie_short(i, movie)
         
         if user2_movies:
             print(f"\n🎬 Специально для {user2_name} (30%):")
             print()
-            for i, idx in enumerate(user2_movies, 1):
-                movie = self.catalog.get_movie_by_index(idx)
+            for i, movie in enumerate(self.catalog.get_movies(user2_movies), 1):
                 if movie:
                     self._print_movie_short(i, movie)
         
         if intersection_movies:
             print(f"\n🎬 Для совместного просмотра (40%):")
             print()
-            for i, idx in enumerate(intersection_movies, 1):
-                movie = self.catalog.get_movie_by_index(idx)
+            for i, movie in enumerate(self.catalog.get_movies(intersection_movies), 1):
                 if movie:
                     self._print_movie_short(i, movie)
         
@@ -237,8 +238,7 @@ class ConsoleUI:
         """
         self.print_header("Ваша персональная подборка")
         
-        for i, idx in enumerate(movie_indices, 1):
-            movie = self.catalog.get_movie_by_index(idx)
+        for i, movie in enumerate(self.catalog.get_movies(movie_indices), 1):
             if movie:
                 self.print_movie_detailed(movie)
         
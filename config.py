@@ -9,14 +9,30 @@ load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
 OPENAI_MODEL = "gpt-3.5-turbo"  # or "gpt-4"
 OPENAI_EMBEDDING_MODEL = "text-embedding-3-small"  # or "text-embedding-3-large"
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None  # Другой endpoint API, например локальный stub (tools/stub_openai_server.py)
+EMBEDDING_PROVIDER = "openai"  # "openai" - OpenAI API, "local" - офлайн n-gram модель (тесты, бенчмарки)
 
 # Database Configuration
 DATABASE_PATH = "data/users.db"
-EMBEDDINGS_CACHE_PATH = "data/embeddings_cache.pkl"
+EMBEDDINGS_CACHE_PATH = "data/embeddings_cache.json"  # sidecar, matrix .npy lives next to it
+LEGACY_EMBEDDINGS_CACHE_PATH = "data/embeddings_cache.pkl"  # old pickle cache, migrated on load
+EMBEDDINGS_TRUST_UNTAGGED = False  # True - векторы из старого кэша без хеша описания считаются актуальными (без переэмбеддинга)
 SESSIONS_DIR = "data/sessions"
+QUERY_CACHE_PATH = "data/query_cache.db"  # SQLite кеш embeddings запросов (None - только в памяти)
+QUERY_CACHE_MAX_MB = 32                   # Лимит LRU кеша запросов в памяти
+QUERY_MICRO_BATCHING = False              # Объединять одновременные запросы embeddings в общие вызовы API
+MICRO_BATCH_WAIT_MS = 5                   # Сколько ждать соседние запросы перед общим вызовом API
+MICRO_BATCH_MAX_SIZE = 64                 # Максимум текстов в одном общем вызове
 
 # Catalog Configuration
 CATALOG_PATH = "catalog_okko.parquet"
+CATALOG_LOAD_MODE = "full"              # "search" - без тяжелых текстовых колонок, они читаются из parquet по требованию
+CATALOG_LAZY_COLUMNS = ["description"]  # Тяжелые колонки, которые режим "search" не держит в DataFrame
+CATALOG_CATEGORY_MAX_SHARE = 0.5        # Текстовая колонка с долей уникальных значений ниже порога хранится как category
+CATALOG_STREAM_BATCH_ROWS = 8192        # Строк в пакете при потоковом чтении каталога (память ограничена размером пакета)
+CATALOG_WATCH_INTERVAL = 30             # Секунд между проверками файла каталога для горячей перезагрузки (0 - не следить)
+FUZZY_NAME_MATCHING = True              # Не нашли актера/режиссера по подстроке - ищем ближайшие имена по триграммам
+FUZZY_NAME_MIN_SCORE = 0.5              # Минимальная похожесть имени (0..1) для нечеткого совпадения
 
 # Recommendation Engine Configuration
 RECOMMENDATION_SPLIT = {
@@ -32,6 +48,22 @@ FINAL_RECOMMENDATIONS_COUNT = 15    # Итоговая подборка
 # Embedding Configuration
 EMBEDDING_DIMENSION = 1536  # для text-embedding-3-small
 SIMILARITY_THRESHOLD = 0.7  # Минимальное сходство для пересечений
+EMBEDDING_BATCH_SIZE = 256        # Максимум текстов в одном запросе к API (лимит API - 2048)
+EMBEDDING_BATCH_TOKENS = 200000   # Бюджет токенов на запрос (лимит API - 300k)
+EMBEDDING_MAX_INPUT_TOKENS = 8191  # Лимит модели на один текст, длиннее - обрезается
+EMBEDDING_CONCURRENCY = 8         # Одновременных запросов при построении каталога
+EMBEDDING_MAX_RETRIES = 6         # Повторов батча при rate limit / сетевых ошибках
+EMBEDDING_RETRY_BASE_DELAY = 1.0  # Начальная пауза перед повтором, сек (удваивается)
+
+# Vector Search Configuration
+VECTOR_SEARCH_MODE = "exact"  # "exact" - полный перебор, "ivf" - приближенный поиск (IVF)
+IVF_NLIST = None              # Число кластеров IVF (None - 4 * sqrt(N))
+IVF_NPROBE = 8                # Кластеров на запрос: больше - точнее, но медленнее
+EMBEDDING_STORAGE = "float32"  # "float16" / "int8" - сжатые векторы в памяти + точное переранжирование с диска
+RERANK_FACTOR = 4              # Кандидатов на переранжирование: top_k * RERANK_FACTOR
+EMBEDDING_REDUCED_DIMENSION = None  # Например 256: поиск в пространстве меньшей размерности (None - полная)
+EMBEDDING_REDUCTION = "pca"        # "pca" - проекция, обученная на каталоге и сохраняемая рядом с кэшем;
+                                   # "native" - параметр dimensions модели (кэш пересчитывается)
 
 # AI Assistant Configuration
 MAX_CONVERSATION_TURNS = 5  # Максимум обменов в диалоге
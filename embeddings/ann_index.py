@@ -0,0 +1,167 @@
+"""Approximate nearest-neighbour index (IVF) for the vector store."""
+import numpy as np
+from typing import Optional
+from pathlib import Path
+from embeddings.normalized_similarity import normalize_embeddings
+
+
+class IVFIndex:
+    """Inverted-file index with a spherical k-means coarse quantizer.
+    
+    Every stored row is assigned to its nearest centroid ("list"). A query
+    only scores the rows in its `nprobe` closest lists, so the per-query cost
+    drops from O(N*D) to roughly O((nlist + N*nprobe/nlist)*D). Larger
+    `nprobe` means better recall and slower search.
+    """
+    
+    def __init__(self, nlist: int = None, nprobe: int = 8, iterations: int = 15, seed: int = 0):
+        """Initialize index.
+        
+        Args:
+            nlist: Number of k-means lists (default: 4 * sqrt(N) at build time)
+            nprobe: Number of lists scanned per query
+            iterations: k-means iterations
+            seed: Random seed for centroid initialization and sampling
+        """
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.iterations = iterations
+        self.seed = seed
+        
+        self.centroids: Optional[np.ndarray] = None  # (nlist, D), normalized
+        self.list_offsets: Optional[np.ndarray] = None  # (nlist + 1,) into list_rows
+        self.list_rows: Optional[np.ndarray] = None  # row ids grouped by list
+        self.fingerprint: Optional[str] = None  # checksum of the indexed matrix
+    
+    @property
+    def size(self) -> int:
+        """Number of indexed rows."""
+        return 0 if self.list_rows is None else len(self.list_rows)
+    
+    @staticmethod
+    def _assign(vectors: np.ndarray, centroids: np.ndarray, chunk_size: int = 8192) -> np.ndarray:
+        """Assign each row to its most similar centroid.
+        
+        Args:
+            vectors: Row vectors (normalized inside, chunk by chunk)
+            centroids: Normalized centroids
+            chunk_size: Rows scored per matrix product
+        
+        Returns:
+            Array with centroid id per row
+        """
+        assignments = np.empty(len(vectors), dtype=np.int64)
+        for start in range(0, len(vectors), chunk_size):
+            chunk = normalize_embeddings(vectors[start:start + chunk_size])
+            assignments[start:start + chunk_size] = np.argmax(chunk @ centroids.T, axis=1)
+        return assignments
+    
+    def build(self, matrix: np.ndarray, fingerprint: str = None):
+        """Train the coarse quantizer and fill the inverted lists.
+        
+        Args:
+            matrix: Embedding matrix (N x D), row ids are positions
+            fingerprint: Checksum of the matrix, stored for staleness checks
+        """
+        n_rows = len(matrix)
+        if n_rows == 0:
+            raise ValueError("Cannot build an index over an empty matrix")
+        
+        rng = np.random.default_rng(self.seed)
+        nlist = self.nlist or max(1, int(4 * np.sqrt(n_rows)))
+        nlist = min(nlist, n_rows)
+        
+        # Train on a sample; ~256 points per list is plenty for k-means
+        sample_size = min(n_rows, nlist * 256)
+        sample_rows = np.sort(rng.choice(n_rows, sample_size, replace=False))
+        sample = normalize_embeddings(matrix[sample_rows])
+        
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+        for _ in range(self.iterations):
+            assignments = self._assign(sample, centroids)
+            order = np.argsort(assignments, kind='stable')
+            counts = np.bincount(assignments, minlength=nlist)
+            
+            sums = np.zeros_like(centroids)
+            non_empty = counts > 0
+            starts = np.concatenate(([0], np.cumsum(counts)[:-1]))[non_empty]
+            sums[non_empty] = np.add.reduceat(sample[order], starts, axis=0)
+            
+            # Re-seed empty lists with random sample points
+            if not non_empty.all():
+                sums[~non_empty] = sample[rng.choice(sample_size, int((~non_empty).sum()))]
+            
+            centroids = normalize_embeddings(sums)
+        
+        assignments = self._assign(matrix, centroids)
+        counts = np.bincount(assignments, minlength=nlist)
+        
+        self.nlist = nlist
+        self.centroids = centroids
+        self.list_rows = np.argsort(assignments, kind='stable').astype(np.int64)
+        self.list_offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+        self.fingerprint = fingerprint
+    
+    def probe(self, query_embedding: np.ndarray, nprobe: int = None) -> np.ndarray:
+        """Get candidate rows for a query.
+        
+        Args:
+            query_embedding: Query embedding vector
+            nprobe: Lists to scan (defaults to self.nprobe)
+        
+        Returns:
+            Sorted array of candidate row ids
+        """
+        if self.centroids is None:
+            raise ValueError("Index not built. Call build() or load() first.")
+        
+        nprobe = min(nprobe or self.nprobe, self.nlist)
+        query = normalize_embeddings(np.asarray(query_embedding).ravel())
+        centroid_scores = self.centroids @ query
+        
+        if nprobe < self.nlist:
+            lists = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+        else:
+            lists = np.arange(self.nlist)
+        
+        rows = [self.list_rows[self.list_offsets[i]:self.list_offsets[i + 1]] for i in lists]
+        return np.sort(np.concatenate(rows))
+    
+    def save(self, path: str):
+        """Save index next to the embeddings cache.
+        
+        Args:
+            path: Destination .npz path
+        """
+        from embeddings.vector_store import _atomic_write
+        
+        _atomic_write(Path(path), lambda f: np.savez(
+            f,
+            centroids=self.centroids,
+            list_offsets=self.list_offsets,
+            list_rows=self.list_rows,
+            fingerprint=np.array(self.fingerprint or "")
+        ))
+    
+    @classmethod
+    def load(cls, path: str, nprobe: int = 8) -> Optional['IVFIndex']:
+        """Load index from disk.
+        
+        Args:
+            path: Source .npz path
+            nprobe: Lists scanned per query
+        
+        Returns:
+            Loaded index or None if the file does not exist
+        """
+        if not Path(path).exists():
+            return None
+        
+        with np.load(path) as data:
+            index = cls(nlist=len(data['centroids']), nprobe=nprobe)
+            index.centroids = data['centroids']
+            index.list_offsets = data['list_offsets']
+            index.list_rows = data['list_rows']
+            index.fingerprint = str(data['fingerprint']) or None
+        
+        return index
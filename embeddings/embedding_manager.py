@@ -1,84 +1,281 @@
-"""Embedding manager for OpenAI embeddings API."""
+"""Embedding manager: batching, retries and caching on top of a provider."""
+import asyncio
+import random
+import threading
 import numpy as np
-from typing import List, Union
-from openai import OpenAI
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple, Union
+from embeddings.providers import EmbeddingProvider, create_provider
+from embeddings.query_cache import QueryEmbeddingCache
+from embeddings.token_budget import estimate_tokens, plan_batches, truncate_to_tokens
 import config
 
 
+class EmbeddingBatchError(RuntimeError):
+    """Raised when some batches of a bulk embedding request failed.
+    
+    Attributes:
+        embeddings: Embeddings aligned with the input texts, None where failed
+        failed_batches: 1-based numbers of the failed batches
+    """
+    
+    def __init__(self, embeddings: List[Optional[np.ndarray]], failed_batches: List[int]):
+        self.embeddings = embeddings
+        self.failed_batches = failed_batches
+        missing = sum(emb is None for emb in embeddings)
+        super().__init__(
+            f"{len(failed_batches)} batch(es) failed, {missing}/{len(embeddings)} embeddings missing"
+        )
+
+
 class EmbeddingManager:
-    """Manages embedding generation using OpenAI API."""
+    """Manages embedding generation through an embedding provider."""
     
-    def __init__(self, api_key: str = None, model: str = None):
+    def __init__(
+        self,
+        api_key: str = None,
+        model: str = None,
+        query_cache: QueryEmbeddingCache = None,
+        provider: EmbeddingProvider = None,
+        micro_batching: bool = None
+    ):
         """Initialize embedding manager.
         
         Args:
             api_key: OpenAI API key (defaults to config)
             model: Embedding model name (defaults to config)
+            query_cache: Cache for single-text embeddings (default: one built from config)
+            provider: Embedding backend (default: config.EMBEDDING_PROVIDER)
+            micro_batching: Coalesce concurrent create_embedding calls into
+                shared API calls (defaults to config.QUERY_MICRO_BATCHING)
         """
-        self.api_key = api_key or config.OPENAI_API_KEY
-        self.model = model or config.OPENAI_EMBEDDING_MODEL
+        self.provider = provider or create_provider(api_key=api_key, model=model)
+        self.model = self.provider.model
+        self.query_cache = query_cache or QueryEmbeddingCache()
         
-        if not self.api_key:
-            raise ValueError("OpenAI API key not provided. Set OPENAI_API_KEY in .env file")
-        
-        self.client = OpenAI(api_key=self.api_key)
+        self.micro_batching = config.QUERY_MICRO_BATCHING if micro_batching is None else micro_batching
+        self._batcher = None
+        self._batcher_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._batcher_lock = threading.Lock()
     
     def create_embedding(self, text: str) -> np.ndarray:
         """Create embedding for a single text.
         
+        Results are cached by (model, normalized text), so repeated
+        preference queries skip the API round trip. With micro_batching,
+        a cache miss goes through a QueryMicroBatcher, so requests served
+        by concurrent threads share API calls.
+        
         Args:
             text: Text to embed
             
         Returns:
-            Embedding vector as numpy array
+            Embedding vector as numpy array (float32, read-only)
         """
-        try:
-            response = self.client.embeddings.create(
-                model=self.model,
-                input=text
-            )
-            
-            embedding = response.data[0].embedding
-            return np.array(embedding)
+        if not self.micro_batching:
+            return self.create_embeddings([text])[0]
+        
+        cached = self.query_cache.get(self.model, text)
+        if cached is not None:
+            return cached
+        
+        future = asyncio.run_coroutine_threadsafe(self._micro_batcher().embed(text), self._batcher_loop)
+        return future.result()
+    
+    def _micro_batcher(self):
+        """Get the query micro-batcher, starting its event loop thread on first use."""
+        with self._batcher_lock:
+            if self._batcher is None:
+                from embeddings.micro_batcher import QueryMicroBatcher  # imports this module
+                
+                self._batcher_loop = asyncio.new_event_loop()
+                threading.Thread(target=self._batcher_loop.run_forever, name="query-micro-batcher", daemon=True).start()
+                self._batcher = QueryMicroBatcher(self)
+            return self._batcher
+    
+    def create_embeddings(self, texts: List[str]) -> List[np.ndarray]:
+        """Create embeddings for a few query texts with at most one API call.
+        
+        Cached texts are served from the query cache; the rest are sent
+        together and cached. Meant for small groups (see QueryMicroBatcher);
+        use create_embeddings_batch for the catalog.
+        
+        Args:
+            texts: Texts to embed
             
+        Returns:
+            Embedding vectors (float32, read-only), aligned with texts
+        """
+        results: List[Optional[np.ndarray]] = [self.query_cache.get(self.model, text) for text in texts]
+        missing = [i for i, embedding in enumerate(results) if embedding is None]
+        if not missing:
+            return results
+        
+        try:
+            prepared, _ = self._prepare_texts([texts[i] for i in missing])
+            embeddings = self.provider.embed(prepared)
         except Exception as e:
             print(f"[!] Error creating embedding: {e}")
             raise
+        
+        for i, embedding in zip(missing, embeddings):
+            results[i] = self.query_cache.put(self.model, texts[i], embedding)
+        return results
     
-    def create_embeddings_batch(self, texts: List[str], batch_size: int = 100) -> List[np.ndarray]:
+    def create_embeddings_batch(
+        self,
+        texts: List[str],
+        batch_size: int = None,
+        concurrency: int = None,
+        on_batch: Callable[[int, List[np.ndarray]], None] = None
+    ) -> List[np.ndarray]:
         """Create embeddings for multiple texts in batches.
         
+        Batches are sent concurrently (see create_embeddings_batch_async).
+        
         Args:
             texts: List of texts to embed
-            batch_size: Number of texts to process per API call
+            batch_size: Maximum number of texts per API call
+            concurrency: Maximum number of API calls in flight
+            on_batch: Called as on_batch(start, embeddings) when a batch completes
             
         Returns:
-            List of embedding vectors
+            List of embedding vectors, aligned with texts
+        
+        Raises:
+            EmbeddingBatchError: If some batches still failed after retries
         """
-        all_embeddings = []
+        coroutine = self.create_embeddings_batch_async(texts, batch_size, concurrency, on_batch)
         
-        # Process in batches
-        for i in range(0, len(texts), batch_size):
-            batch = texts[i:i + batch_size]
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            in_event_loop = False
+        else:
+            in_event_loop = True
+        
+        if not in_event_loop:
+            return asyncio.run(coroutine)
+        
+        # Called from inside an event loop: run ours in a worker thread
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, coroutine).result()
+    
+    async def create_embeddings_batch_async(
+        self,
+        texts: List[str],
+        batch_size: int = None,
+        concurrency: int = None,
+        on_batch: Callable[[int, List[np.ndarray]], None] = None
+    ) -> List[np.ndarray]:
+        """Create embeddings for multiple texts with bounded concurrency.
+        
+        Batches are sized by an estimated token budget (provider
+        max_batch_tokens) as well as by item count, and texts over the
+        model's input limit are truncated. Up to `concurrency` batches are
+        in flight at once. A batch that hits a rate limit or a transient
+        error is retried with exponential backoff; other batches keep going
+        meanwhile.
+        
+        Args:
+            texts: List of texts to embed
+            batch_size: Maximum number of texts per API call
+            concurrency: Maximum number of API calls in flight
+            on_batch: Called as on_batch(start, embeddings) when a batch
+                completes, e.g. to checkpoint it; start is the offset in texts
             
+        Returns:
+            List of embedding vectors, aligned with texts
+        
+        Raises:
+            EmbeddingBatchError: If some batches still failed after retries
+        """
+        batch_size = batch_size or config.EMBEDDING_BATCH_SIZE
+        semaphore = asyncio.Semaphore(concurrency or config.EMBEDDING_CONCURRENCY)
+        
+        texts, token_counts = self._prepare_texts(texts)
+        batches = plan_batches(token_counts, self.provider.max_batch_tokens, batch_size)
+        embeddings: List[Optional[np.ndarray]] = [None] * len(texts)
+        done = 0
+        
+        async def run_batch(batch_number: int, start: int, end: int):
+            nonlocal done
+            batch = texts[start:end]
+            async with semaphore:
+                batch_embeddings = await self._embed_with_retry(batch, batch_number)
+            embeddings[start:start + len(batch)] = batch_embeddings
+            if on_batch is not None:
+                on_batch(start, batch_embeddings)
+            done += len(batch)
+            print(f"[+] Processed {done}/{len(texts)} embeddings")
+        
+        # Async clients are bound to the running event loop, so open a session per call
+        async with self.provider.session():
+            results = await asyncio.gather(
+                *(run_batch(number, start, end) for number, (start, end) in enumerate(batches, 1)),
+                return_exceptions=True
+            )
+        
+        failed = [number for number, result in enumerate(results, 1) if isinstance(result, Exception)]
+        if failed:
+            raise EmbeddingBatchError(embeddings, failed)
+        
+        return embeddings
+    
+    def _prepare_texts(self, texts: List[str]) -> Tuple[List[str], List[int]]:
+        """Truncate texts to the model input limit and estimate their tokens.
+        
+        Args:
+            texts: Texts to embed
+        
+        Returns:
+            Tuple of (texts that fit the limit, estimated token count per text)
+        """
+        limit = self.provider.max_input_tokens
+        prepared, token_counts = [], []
+        truncated = 0
+        
+        for text in texts:
+            tokens = estimate_tokens(text, self.model)
+            if limit is not None and tokens > limit:
+                text = truncate_to_tokens(text, limit, self.model)
+                tokens = estimate_tokens(text, self.model)
+                truncated += 1
+            prepared.append(text)
+            token_counts.append(tokens)
+        
+        if truncated:
+            print(f"[i] Truncated {truncated} text(s) to {limit} tokens")
+        
+        return prepared, token_counts
+    
+    async def _embed_with_retry(self, batch: List[str], batch_number: int) -> List[np.ndarray]:
+        """Embed one batch, retrying transient errors with exponential backoff.
+        
+        Args:
+            batch: Texts of the batch
+            batch_number: 1-based batch number for log messages
+        
+        Returns:
+            Embedding vectors in batch order
+        """
+        for attempt in range(config.EMBEDDING_MAX_RETRIES + 1):
             try:
-                response = self.client.embeddings.create(
-                    model=self.model,
-                    input=batch
-                )
-                
-                # Extract embeddings in the same order
-                batch_embeddings = [np.array(item.embedding) for item in response.data]
-                all_embeddings.extend(batch_embeddings)
-                
-                print(f"[+] Processed {len(all_embeddings)}/{len(texts)} embeddings")
+                return await self.provider.embed_async(batch)
+            
+            except self.provider.retryable_errors as e:
+                if attempt == config.EMBEDDING_MAX_RETRIES:
+                    print(f"[!] Error in batch {batch_number}, giving up after {attempt + 1} attempts: {e}")
+                    raise
                 
+                delay = config.EMBEDDING_RETRY_BASE_DELAY * 2 ** attempt
+                delay *= random.uniform(0.5, 1.0)  # jitter so retries do not arrive together
+                print(f"[i] Batch {batch_number}: {type(e).__name__}, retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+            
             except Exception as e:
-                print(f"[!] Error in batch {i//batch_size + 1}: {e}")
-                # Return what we have so far
-                break
-        
-        return all_embeddings
+                print(f"[!] Error in batch {batch_number}: {e}")
+                raise
     
     def embed_user_query(self, query: str) -> np.ndarray:
         """Create embedding for user query or preference.
@@ -0,0 +1,136 @@
+"""Async micro-batching of query embeddings for the API server."""
+import asyncio
+import numpy as np
+from typing import Dict, List, Optional, Set, Tuple
+from embeddings.embedding_manager import EmbeddingManager
+from embeddings.query_cache import query_key
+import config
+
+
+class QueryMicroBatcher:
+    """Coalesces concurrent single-text embedding requests.
+    
+    Requests arriving within `max_wait_ms` of each other are collected,
+    identical texts (same cache key) are merged, and the group is sent as
+    one embeddings call; every waiting request then gets its vector. A
+    text that is already in flight is not sent again: later requests
+    await the same result.
+    
+    Must be used from a single event loop (one instance per server
+    process). The blocking API call runs in a worker thread.
+    """
+    
+    def __init__(
+        self,
+        embedding_manager: EmbeddingManager,
+        max_wait_ms: float = None,
+        max_batch_size: int = None
+    ):
+        """Initialize micro-batcher.
+        
+        Args:
+            embedding_manager: Embedding manager used for the batched calls
+            max_wait_ms: How long the first request of a group waits for others
+            max_batch_size: Group size that triggers an immediate call
+        """
+        self.manager = embedding_manager
+        self.max_wait = (max_wait_ms if max_wait_ms is not None else config.MICRO_BATCH_WAIT_MS) / 1000
+        self.max_batch_size = max_batch_size or config.MICRO_BATCH_MAX_SIZE
+        
+        self._futures: Dict[Tuple[str, str], asyncio.Future] = {}  # key -> result, pending or in flight
+        self._pending: Dict[Tuple[str, str], str] = {}  # key -> text waiting for the next call
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+        
+        # Counters for monitoring
+        self.requests = 0
+        self.coalesced = 0
+        self.api_calls = 0
+    
+    async def embed(self, text: str) -> np.ndarray:
+        """Get embedding for a query text.
+        
+        Args:
+            text: Query text
+        
+        Returns:
+            Embedding vector (float32, read-only)
+        """
+        self.requests += 1
+        
+        cached = self.manager.query_cache.get(self.manager.model, text)
+        if cached is not None:
+            return cached
+        
+        key = query_key(self.manager.model, text)
+        future = self._futures.get(key)
+        
+        if future is not None:
+            self.coalesced += 1
+        else:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._futures[key] = future
+            self._pending[key] = text
+            
+            if len(self._pending) >= self.max_batch_size:
+                self._flush()
+            elif self._timer is None:
+                self._timer = loop.call_later(self.max_wait, self._flush)
+        
+        # A cancelled request must not cancel the result other requests wait for
+        return await asyncio.shield(future)
+    
+    async def embed_many(self, texts: List[str]) -> List[np.ndarray]:
+        """Get embeddings for several query texts of one request.
+        
+        Args:
+            texts: Query texts
+        
+        Returns:
+            Embedding vectors, aligned with texts
+        """
+        return list(await asyncio.gather(*(self.embed(text) for text in texts)))
+    
+    def _flush(self):
+        """Send the collected texts as one call."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        
+        batch, self._pending = self._pending, {}
+        if not batch:
+            return
+        
+        task = asyncio.get_running_loop().create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+    
+    async def _run(self, batch: Dict[Tuple[str, str], str]):
+        """Embed one group and resolve its futures.
+        
+        Args:
+            batch: Cache key -> text
+        """
+        keys = list(batch)
+        self.api_calls += 1
+        
+        try:
+            embeddings = await asyncio.to_thread(self.manager.create_embeddings, [batch[key] for key in keys])
+        except Exception as e:
+            for key in keys:
+                future = self._futures.pop(key)
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for key, embedding in zip(keys, embeddings):
+            future = self._futures.pop(key)
+            if not future.done():
+                future.set_result(embedding)
+    
+    async def close(self):
+        """Send anything still collected and wait for calls in flight."""
+        self._flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
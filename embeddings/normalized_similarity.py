@@ -0,0 +1,98 @@
+"""Dot-product similarity for L2-normalized float32 embeddings.
+
+For unit vectors cosine similarity is a plain dot product, so these helpers
+skip the per-call norm computation done by sklearn's cosine_similarity.
+Inputs are expected to be normalized (see normalize_embeddings); catalog
+vectors in VectorStore already are.
+"""
+import numpy as np
+from typing import List, Tuple, Union
+from embeddings.ranking import top_k_indices
+
+
+def normalize_embeddings(embeddings: Union[List[np.ndarray], np.ndarray]) -> np.ndarray:
+    """L2-normalize one vector or a matrix of row vectors.
+    
+    Args:
+        embeddings: Embedding vector (D,) or matrix (N x D)
+    
+    Returns:
+        Normalized float32 copy (zero vectors stay zero)
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(embeddings, axis=-1, keepdims=True)
+    return np.divide(embeddings, norms, out=np.zeros_like(embeddings), where=norms > 0)
+
+
+def cosine_similarity(embedding1: np.ndarray, embedding2: np.ndarray) -> float:
+    """Calculate cosine similarity between two normalized embeddings.
+    
+    Args:
+        embedding1: First normalized embedding vector
+        embedding2: Second normalized embedding vector
+    
+    Returns:
+        Cosine similarity score
+    """
+    return float(np.dot(embedding1, embedding2))
+
+
+def calculate_similarity_matrix(embeddings: Union[List[np.ndarray], np.ndarray]) -> np.ndarray:
+    """Calculate pairwise similarity matrix for normalized embeddings.
+    
+    Args:
+        embeddings: Normalized embedding vectors (N x D)
+    
+    Returns:
+        Similarity matrix (n x n)
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    return embeddings @ embeddings.T
+
+
+def find_most_similar(
+    query_embedding: np.ndarray,
+    candidate_embeddings: Union[List[np.ndarray], np.ndarray],
+    top_k: int = 10
+) -> List[Tuple[int, float]]:
+    """Find most similar normalized embeddings to a normalized query.
+    
+    Args:
+        query_embedding: Normalized query embedding vector
+        candidate_embeddings: Normalized candidate embeddings (N x D)
+        top_k: Number of top results to return
+    
+    Returns:
+        List of (index, similarity_score) tuples, sorted by similarity descending
+    """
+    candidates = np.asarray(candidate_embeddings, dtype=np.float32)
+    if candidates.size == 0 or top_k <= 0:
+        return []
+    
+    scores = candidates @ np.asarray(query_embedding, dtype=np.float32)
+    
+    # Equal scores keep candidate order
+    order = top_k_indices(scores, top_k)
+    return [(int(i), float(scores[i])) for i in order]
+
+
+def average_embeddings(
+    embeddings: Union[List[np.ndarray], np.ndarray],
+    weights: List[float] = None
+) -> np.ndarray:
+    """Calculate normalized weighted average of embeddings.
+    
+    Args:
+        embeddings: Embedding vectors (N x D)
+        weights: Optional weights for each embedding (default: equal weights)
+    
+    Returns:
+        Normalized float32 average embedding vector
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    
+    if weights is None:
+        return normalize_embeddings(embeddings.mean(axis=0))
+    
+    weights = np.asarray(weights, dtype=np.float32)
+    return normalize_embeddings((weights @ embeddings) / weights.sum())
@@ -0,0 +1,229 @@
+"""Embedding providers: OpenAI API and a fully local hashed n-gram model."""
+import asyncio
+import numpy as np
+from contextlib import asynccontextmanager
+from typing import List, Optional, Tuple, Type
+from embeddings.normalized_similarity import normalize_embeddings
+import config
+
+
+class EmbeddingProvider:
+    """Interface of an embedding backend.
+    
+    A provider turns a batch of texts into vectors. Batching, concurrency,
+    retries and caching are handled by EmbeddingManager on top of it.
+    """
+    
+    model: str = ""  # model identifier, stored with cached vectors
+    retryable_errors: Tuple[Type[Exception], ...] = ()  # errors worth retrying with backoff
+    max_input_tokens: Optional[int] = None  # longer texts are truncated (None - no limit)
+    max_batch_tokens: Optional[int] = None  # token budget per embed() call (None - no budget)
+    
+    def embed(self, texts: List[str]) -> List[np.ndarray]:
+        """Embed a batch of texts.
+        
+        Args:
+            texts: Texts to embed
+        
+        Returns:
+            Embedding vectors in input order
+        """
+        raise NotImplementedError
+    
+    async def embed_async(self, texts: List[str]) -> List[np.ndarray]:
+        """Embed a batch of texts without blocking the event loop.
+        
+        Args:
+            texts: Texts to embed
+        
+        Returns:
+            Embedding vectors in input order
+        """
+        return await asyncio.to_thread(self.embed, texts)
+    
+    @asynccontextmanager
+    async def session(self):
+        """Hold per-event-loop resources for a series of embed_async calls."""
+        yield
+
+
+class OpenAIProvider(EmbeddingProvider):
+    """Embeddings from the OpenAI API."""
+    
+    def __init__(self, api_key: str = None, model: str = None):
+        """Initialize provider.
+        
+        Args:
+            api_key: OpenAI API key (defaults to config)
+            model: Embedding model name (defaults to config)
+        """
+        import openai
+        
+        self.api_key = api_key or config.OPENAI_API_KEY
+        self.api_model = model or config.OPENAI_EMBEDDING_MODEL
+        self.dimensions = native_dimensions()
+        self.model = self.model_name(self.api_model, self.dimensions)
+        
+        if not self.api_key:
+            raise ValueError("OpenAI API key not provided. Set OPENAI_API_KEY in .env file")
+        
+        # The SDK retries twice on its own; EmbeddingManager is the one retry layer
+        self.client = openai.OpenAI(api_key=self.api_key, base_url=config.OPENAI_BASE_URL, max_retries=0)
+        self._async_client_class = openai.AsyncOpenAI
+        self._async_client = None
+        
+        # Rate limits, timeouts / network, 5xx
+        self.retryable_errors = (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError)
+        
+        self.max_input_tokens = config.EMBEDDING_MAX_INPUT_TOKENS
+        self.max_batch_tokens = config.EMBEDDING_BATCH_TOKENS
+    
+    @staticmethod
+    def model_name(api_model: str, dimensions: Optional[int] = None) -> str:
+        """Get model identifier for given settings.
+        
+        Args:
+            api_model: Model name in the API
+            dimensions: Requested output dimension (None for the model default)
+        
+        Returns:
+            Model name stored with cached vectors
+        """
+        return api_model if dimensions is None else f"{api_model}-{dimensions}d"
+    
+    def _request_args(self, texts: List[str]) -> dict:
+        """Build keyword arguments of an embeddings request."""
+        args = {'model': self.api_model, 'input': texts}
+        if self.dimensions is not None:
+            args['dimensions'] = self.dimensions  # shortened vectors, text-embedding-3 models only
+        return args
+    
+    @staticmethod
+    def _vectors(response, expected: int) -> List[np.ndarray]:
+        """Extract vectors from an embeddings response in input order."""
+        ordered = sorted(response.data, key=lambda item: item.index)
+        if len(ordered) != expected:
+            raise ValueError(f"expected {expected} embeddings, got {len(ordered)}")
+        return [np.array(item.embedding, dtype=np.float32) for item in ordered]
+    
+    def embed(self, texts: List[str]) -> List[np.ndarray]:
+        """Embed a batch of texts with one API call."""
+        response = self.client.embeddings.create(**self._request_args(texts))
+        return self._vectors(response, len(texts))
+    
+    async def embed_async(self, texts: List[str]) -> List[np.ndarray]:
+        """Embed a batch of texts with one async API call (inside session())."""
+        if self._async_client is None:
+            raise RuntimeError("embed_async must be called inside session()")
+        
+        response = await self._async_client.embeddings.create(**self._request_args(texts))
+        return self._vectors(response, len(texts))
+    
+    @asynccontextmanager
+    async def session(self):
+        """Open an async client; it is bound to the running event loop."""
+        async with self._async_client_class(api_key=self.api_key, base_url=config.OPENAI_BASE_URL,
+                                            max_retries=0) as client:
+            self._async_client = client
+            try:
+                yield
+            finally:
+                self._async_client = None
+
+
+class LocalNgramProvider(EmbeddingProvider):
+    """Offline embeddings from hashed character n-grams.
+    
+    Character n-grams (within word boundaries) are hashed with random
+    signs straight into `dimension` buckets. This is a sparse random
+    projection of the n-gram count vector, so no projection matrix is
+    stored. Counts are damped with log1p and vectors are L2-normalized.
+    
+    Deterministic and needs no network or API key, so the whole pipeline
+    can be run and timed on an air-gapped machine. Quality is that of a
+    fuzzy lexical match, not of a semantic model.
+    """
+    
+    def __init__(self, dimension: int = None, ngram_range: Tuple[int, int] = (3, 5)):
+        """Initialize provider.
+        
+        Args:
+            dimension: Output dimension (defaults to the 'native' reduced
+                dimension, then config.EMBEDDING_DIMENSION)
+            ngram_range: Min and max character n-gram length
+        """
+        from sklearn.feature_extraction.text import HashingVectorizer
+        
+        self.dimension = dimension or native_dimensions() or config.EMBEDDING_DIMENSION
+        self.model = self.model_name(self.dimension, ngram_range)
+        
+        self._vectorizer = HashingVectorizer(
+            n_features=self.dimension,
+            analyzer='char_wb',
+            ngram_range=ngram_range,
+            lowercase=True,
+            alternate_sign=True,
+            norm=None
+        )
+    
+    @staticmethod
+    def model_name(dimension: int, ngram_range: Tuple[int, int] = (3, 5)) -> str:
+        """Get model identifier for given settings.
+        
+        Args:
+            dimension: Output dimension
+            ngram_range: Min and max character n-gram length
+        
+        Returns:
+            Model name stored with cached vectors
+        """
+        return f"local-char-ngram-{ngram_range[0]}-{ngram_range[1]}-{dimension}"
+    
+    def embed(self, texts: List[str]) -> List[np.ndarray]:
+        """Embed a batch of texts locally."""
+        counts = self._vectorizer.transform(texts)
+        counts.data = np.sign(counts.data) * np.log1p(np.abs(counts.data))
+        return list(normalize_embeddings(counts.toarray()))
+
+
+def native_dimensions() -> Optional[int]:
+    """Get output dimension to request from the model itself.
+    
+    Returns:
+        Reduced dimension in 'native' reduction mode, otherwise None
+    """
+    if config.EMBEDDING_REDUCTION == 'native':
+        return config.EMBEDDING_REDUCED_DIMENSION
+    return None
+
+
+def create_provider(name: str = None, api_key: str = None, model: str = None) -> EmbeddingProvider:
+    """Create embedding provider by name.
+    
+    Args:
+        name: 'openai' or 'local' (defaults to config.EMBEDDING_PROVIDER)
+        api_key: OpenAI API key (openai only)
+        model: Embedding model name (openai only)
+    
+    Returns:
+        Provider instance
+    """
+    name = name or config.EMBEDDING_PROVIDER
+    
+    if name == 'openai':
+        return OpenAIProvider(api_key=api_key, model=model)
+    if name == 'local':
+        return LocalNgramProvider()
+    
+    raise ValueError(f"Unknown EMBEDDING_PROVIDER: {name}")
+
+
+def configured_model_name() -> str:
+    """Get model identifier of the provider selected in config.
+    
+    Returns:
+        Model name without constructing the provider
+    """
+    if config.EMBEDDING_PROVIDER == 'local':
+        return LocalNgramProvider.model_name(native_dimensions() or config.EMBEDDING_DIMENSION)
+    return OpenAIProvider.model_name(config.OPENAI_EMBEDDING_MODEL, native_dimensions())
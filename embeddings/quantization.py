@@ -0,0 +1,87 @@
+"""Compressed embedding codes (float16 / int8) for coarse vector search."""
+import numpy as np
+from typing import Optional, Tuple
+
+
+STORAGE_MODES = ('float32', 'float16', 'int8')
+
+
+def fit_int8_scale(matrix: np.ndarray, chunk_size: int = 16384) -> np.ndarray:
+    """Fit per-dimension scale for symmetric int8 quantization.
+    
+    Args:
+        matrix: Embedding matrix (N x D), may be a memmap
+        chunk_size: Rows read per step
+    
+    Returns:
+        Scale per dimension (max |x| / 127), zero columns get scale 1
+    """
+    max_abs = np.zeros(matrix.shape[1], dtype=np.float32)
+    for start in range(0, len(matrix), chunk_size):
+        np.maximum(max_abs, np.abs(matrix[start:start + chunk_size]).max(axis=0), out=max_abs)
+    
+    scale = max_abs / 127.0
+    scale[scale == 0] = 1.0
+    return scale.astype(np.float32)
+
+
+def encode(
+    matrix: np.ndarray,
+    storage: str,
+    chunk_size: int = 16384
+) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """Compress an embedding matrix.
+    
+    Args:
+        matrix: Embedding matrix (N x D), may be a memmap
+        storage: 'float16' or 'int8'
+        chunk_size: Rows converted per step
+    
+    Returns:
+        Tuple of (codes, per-dimension scale or None for float16)
+    """
+    if storage == 'float16':
+        codes = np.empty(matrix.shape, dtype=np.float16)
+        for start in range(0, len(matrix), chunk_size):
+            codes[start:start + chunk_size] = matrix[start:start + chunk_size]
+        return codes, None
+    
+    if storage == 'int8':
+        scale = fit_int8_scale(matrix, chunk_size)
+        codes = np.empty(matrix.shape, dtype=np.int8)
+        for start in range(0, len(matrix), chunk_size):
+            chunk = np.asarray(matrix[start:start + chunk_size], dtype=np.float32) / scale
+            codes[start:start + chunk_size] = np.clip(np.rint(chunk), -127, 127)
+        return codes, scale
+    
+    raise ValueError(f"Unknown compressed storage mode: {storage}")
+
+
+def coarse_scores(
+    queries: np.ndarray,
+    codes: np.ndarray,
+    scale: Optional[np.ndarray] = None,
+    chunk_size: int = 16384
+) -> np.ndarray:
+    """Approximate dot products between queries and compressed rows.
+    
+    Codes are widened to float32 chunk by chunk, so the temporary memory is
+    bounded by chunk_size rows rather than the whole catalog.
+    
+    Args:
+        queries: Query embeddings (Q x D, float32)
+        codes: Compressed rows (N x D, float16 or int8)
+        scale: Per-dimension int8 scale (folded into the queries)
+        chunk_size: Rows scored per matrix product
+    
+    Returns:
+        Score matrix (Q x N)
+    """
+    if scale is not None:
+        queries = queries * scale
+    
+    scores = np.empty((len(queries), len(codes)), dtype=np.float32)
+    for start in range(0, len(codes), chunk_size):
+        chunk = codes[start:start + chunk_size].astype(np.float32)
+        scores[:, start:start + chunk_size] = queries @ chunk.T
+    return scores
@@ -0,0 +1,206 @@
+"""Cache of query embeddings: in-process LRU backed by SQLite."""
+import hashlib
+import sqlite3
+import threading
+import unicodedata
+import numpy as np
+from collections import OrderedDict
+from typing import Optional, Tuple
+from pathlib import Path
+import config
+
+
+def normalize_query_text(text: str) -> str:
+    """Normalize query text for cache lookups.
+    
+    Unicode is NFC-normalized and whitespace runs are collapsed, so texts
+    that differ only in spacing share a cache entry. Case is kept: the
+    embedding model is case-sensitive.
+    
+    Args:
+        text: Query text
+    
+    Returns:
+        Normalized text
+    """
+    return " ".join(unicodedata.normalize('NFC', text).split())
+
+
+def query_key(model: str, text: str) -> Tuple[str, str]:
+    """Build cache key for a query.
+    
+    Args:
+        model: Embedding model name
+        text: Query text (normalized inside)
+    
+    Returns:
+        Tuple of (model, sha256 of normalized text)
+    """
+    text_hash = hashlib.sha256(normalize_query_text(text).encode('utf-8')).hexdigest()
+    return model, text_hash
+
+
+class QueryEmbeddingCache:
+    """Two-level cache of query embeddings.
+    
+    Hot entries live in an in-process LRU bounded by total vector bytes;
+    every entry is also written to a SQLite table of float32 blobs, so
+    repeated queries survive restarts and are shared between processes.
+    """
+    
+    def __init__(self, db_path: str = None, max_memory_mb: float = None):
+        """Initialize query cache.
+        
+        Args:
+            db_path: Path to SQLite file (defaults to config, None in config disables disk)
+            max_memory_mb: Size limit of the in-process LRU in megabytes
+        """
+        self.db_path = db_path or config.QUERY_CACHE_PATH
+        max_memory_mb = max_memory_mb if max_memory_mb is not None else config.QUERY_CACHE_MAX_MB
+        self.max_bytes = int(max_memory_mb * 2**20)
+        
+        self._lru: "OrderedDict[Tuple[str, str], np.ndarray]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        
+        self.hits = 0
+        self.misses = 0
+        
+        if self.db_path:
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+            self._create_table()
+    
+    def _get_connection(self) -> sqlite3.Connection:
+        """Get database connection."""
+        return sqlite3.connect(self.db_path, timeout=5)
+    
+    def _create_table(self):
+        """Create cache table if it doesn't exist."""
+        conn = self._get_connection()
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS query_embeddings (
+                model TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                dimension INTEGER NOT NULL,
+                embedding BLOB NOT NULL,
+                PRIMARY KEY (model, text_hash)
+            )
+        ''')
+        conn.commit()
+        conn.close()
+    
+    def _remember(self, key: Tuple[str, str], embedding: np.ndarray):
+        """Put an entry into the LRU, evicting the oldest ones over the size limit."""
+        with self._lock:
+            old = self._lru.pop(key, None)
+            if old is not None:
+                self._bytes -= old.nbytes
+            
+            if embedding.nbytes > self.max_bytes:
+                return
+            
+            self._lru[key] = embedding
+            self._bytes += embedding.nbytes
+            
+            while self._bytes > self.max_bytes:
+                _, evicted = self._lru.popitem(last=False)
+                self._bytes -= evicted.nbytes
+    
+    def get(self, model: str, text: str) -> Optional[np.ndarray]:
+        """Look up a query embedding.
+        
+        Args:
+            model: Embedding model name
+            text: Query text
+        
+        Returns:
+            Cached float32 embedding (read-only) or None
+        """
+        key = query_key(model, text)
+        
+        with self._lock:
+            embedding = self._lru.get(key)
+            if embedding is not None:
+                self._lru.move_to_end(key)
+                self.hits += 1
+                return embedding
+        
+        embedding = self._load(key)
+        if embedding is None:
+            self.misses += 1
+            return None
+        
+        self.hits += 1
+        self._remember(key, embedding)
+        return embedding
+    
+    def put(self, model: str, text: str, embedding: np.ndarray) -> np.ndarray:
+        """Store a query embedding.
+        
+        Args:
+            model: Embedding model name
+            text: Query text
+            embedding: Embedding vector
+        
+        Returns:
+            Stored float32 embedding (read-only)
+        """
+        key = query_key(model, text)
+        embedding = np.array(embedding, dtype=np.float32).ravel()
+        embedding.flags.writeable = False  # shared by every caller that hits this entry
+        
+        self._remember(key, embedding)
+        self._store(key, embedding)
+        return embedding
+    
+    def _load(self, key: Tuple[str, str]) -> Optional[np.ndarray]:
+        """Read an entry from SQLite."""
+        if not self.db_path:
+            return None
+        
+        try:
+            conn = self._get_connection()
+            row = conn.execute(
+                'SELECT dimension, embedding FROM query_embeddings WHERE model = ? AND text_hash = ?',
+                key
+            ).fetchone()
+            conn.close()
+        except sqlite3.Error as e:
+            print(f"[!] Error reading query cache: {e}")
+            return None
+        
+        if row is None:
+            return None
+        
+        dimension, blob = row
+        embedding = np.frombuffer(blob, dtype=np.float32)
+        return embedding if len(embedding) == dimension else None
+    
+    def _store(self, key: Tuple[str, str], embedding: np.ndarray):
+        """Write an entry to SQLite."""
+        if not self.db_path:
+            return
+        
+        try:
+            conn = self._get_connection()
+            conn.execute(
+                'INSERT OR REPLACE INTO query_embeddings (model, text_hash, dimension, embedding) '
+                'VALUES (?, ?, ?, ?)',
+                (*key, len(embedding), embedding.tobytes())
+            )
+            conn.commit()
+            conn.close()
+        except sqlite3.Error as e:
+            print(f"[!] Error writing query cache: {e}")
+    
+    def clear(self):
+        """Drop all cached entries from memory and disk."""
+        with self._lock:
+            self._lru.clear()
+            self._bytes = 0
+        
+        if self.db_path:
+            conn = self._get_connection()
+            conn.execute('DELETE FROM query_embeddings')
+            conn.commit()
+            conn.close()
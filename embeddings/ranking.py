@@ -0,0 +1,41 @@
+"""Top-k selection over score arrays."""
+import numpy as np
+from typing import Union, List
+
+
+def top_k_indices(
+    scores: Union[List[float], np.ndarray],
+    top_k: int,
+    keys: Union[List[int], np.ndarray] = None
+) -> np.ndarray:
+    """Select positions of the top-k scores.
+    
+    np.partition finds the k-th best score in O(N); only the entries at
+    or above it are sorted, so ranking a whole catalog for 10-20 results
+    does not sort N items. Equal scores are ordered by key ascending,
+    including ties that straddle the k-th place, so the result does not
+    depend on partition internals.
+    
+    Args:
+        scores: Score per entry (higher is better, -inf never ranks above finite scores)
+        top_k: Number of entries to select
+        keys: Tie-break key per entry, e.g. movie index (default: position)
+    
+    Returns:
+        Positions of the selected entries, best first
+    """
+    scores = np.asarray(scores)
+    n = len(scores)
+    top_k = min(top_k, n)
+    if top_k <= 0:
+        return np.empty(0, dtype=np.int64)
+    
+    if top_k < n:
+        kth_score = np.partition(scores, n - top_k)[n - top_k]
+        candidates = np.flatnonzero(scores >= kth_score)
+    else:
+        candidates = np.arange(n)
+    
+    tie_keys = candidates if keys is None else np.asarray(keys)[candidates]
+    order = np.lexsort((tie_keys, -scores[candidates]))[:top_k]
+    return candidates[order]
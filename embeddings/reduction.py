@@ -0,0 +1,114 @@
+"""Dimension reduction (PCA projection) for faster vector search."""
+import hashlib
+import numpy as np
+from typing import Optional
+from pathlib import Path
+from embeddings.normalized_similarity import normalize_embeddings
+
+
+class PCAProjection:
+    """Linear projection onto the top principal directions of the catalog.
+    
+    The directions are the top right singular vectors of the (uncentered)
+    embedding matrix, which is the rank-k projection that best preserves
+    dot products with catalog rows. Projected vectors are re-normalized,
+    so cosine similarity stays a dot product in the reduced space.
+    """
+    
+    def __init__(self, dimension: int, sample_size: int = 20000, seed: int = 0):
+        """Initialize projection.
+        
+        Args:
+            dimension: Target dimension
+            sample_size: Rows used to fit the directions
+            seed: Random seed for row sampling
+        """
+        self.dimension = dimension
+        self.sample_size = sample_size
+        self.seed = seed
+        
+        self.components: Optional[np.ndarray] = None  # (dimension, input dimension)
+        self.fingerprint: Optional[str] = None  # hash of the components
+    
+    @property
+    def input_dimension(self) -> int:
+        """Dimension of vectors the projection accepts."""
+        return 0 if self.components is None else self.components.shape[1]
+    
+    def fit(self, matrix: np.ndarray):
+        """Fit projection directions on an embedding matrix.
+        
+        Args:
+            matrix: Embedding matrix (N x D), may be a memmap
+        """
+        n_rows = len(matrix)
+        if n_rows == 0:
+            raise ValueError("Cannot fit a projection on an empty matrix")
+        
+        rng = np.random.default_rng(self.seed)
+        if n_rows > self.sample_size:
+            sample = np.asarray(matrix[np.sort(rng.choice(n_rows, self.sample_size, replace=False))])
+        else:
+            sample = np.asarray(matrix)
+        
+        # Right singular vectors of X are the eigenvectors of X^T X (D x D, cheap for D << N)
+        sample = sample.astype(np.float32)
+        eigenvalues, eigenvectors = np.linalg.eigh((sample.T @ sample).astype(np.float64))
+        order = np.argsort(eigenvalues)[::-1][:min(self.dimension, len(sample))]
+        
+        self.components = np.ascontiguousarray(eigenvectors[:, order].T, dtype=np.float32)
+        self.dimension = len(self.components)  # fewer rows than requested dimensions
+        self.fingerprint = hashlib.sha256(self.components.tobytes()).hexdigest()
+    
+    def transform(self, vectors: np.ndarray, chunk_size: int = 16384) -> np.ndarray:
+        """Project vectors into the reduced space.
+        
+        Args:
+            vectors: Vectors (N x D) or a single vector (D,)
+            chunk_size: Rows projected per step (bounds temporary memory)
+        
+        Returns:
+            Normalized float32 projections (N x dimension) or (dimension,)
+        """
+        if self.components is None:
+            raise ValueError("Projection not fitted. Call fit() or load() first.")
+        
+        if np.ndim(vectors) == 1:
+            return normalize_embeddings(np.asarray(vectors, dtype=np.float32) @ self.components.T)
+        
+        projected = np.empty((len(vectors), self.dimension), dtype=np.float32)
+        for start in range(0, len(vectors), chunk_size):
+            chunk = np.asarray(vectors[start:start + chunk_size], dtype=np.float32)
+            projected[start:start + chunk_size] = normalize_embeddings(chunk @ self.components.T)
+        return projected
+    
+    def save(self, path: str):
+        """Save projection next to the embeddings cache.
+        
+        Args:
+            path: Destination .npz path
+        """
+        from embeddings.vector_store import _atomic_write
+        
+        _atomic_write(Path(path), lambda f: np.savez(f, components=self.components))
+    
+    @classmethod
+    def load(cls, path: str) -> Optional['PCAProjection']:
+        """Load projection from disk.
+        
+        Args:
+            path: Source .npz path
+        
+        Returns:
+            Loaded projection or None if the file does not exist
+        """
+        if not Path(path).exists():
+            return None
+        
+        with np.load(path) as data:
+            components = data['components']
+        
+        projection = cls(dimension=len(components))
+        projection.components = components
+        projection.fingerprint = hashlib.sha256(components.tobytes()).hexdigest()
+        return projection
@@ -1,7 +1,13 @@
-"""Similarity calculation utilities for embeddings."""
+"""Similarity calculation utilities for embeddings.
+
+These accept embeddings of any norm. For vectors that are already
+normalized (e.g. from VectorStore) use embeddings.normalized_similarity.
+"""
 import numpy as np
-from typing import List, Tuple
-from sklearn.metrics.pairwise import cosine_similarity
+from typing import List, Tuple, Union
+from embeddings import normalized_similarity
+from embeddings.normalized_similarity import normalize_embeddings
+from embeddings.ranking import top_k_indices
 
 
 def calculate_cosine_similarity(embedding1: np.ndarray, embedding2: np.ndarray) -> float:
@@ -14,12 +20,10 @@ def calculate_cosine_similarity(embedding1: np.ndarray, embedding2: np.ndarray)
     Returns:
         Cosine similarity score (0 to 1)
     """
-    # Reshape to 2D arrays for sklearn
-    emb1 = embedding1.reshape(1, -1)
-    emb2 = embedding2.reshape(1, -1)
-    
-    similarity = cosine_similarity(emb1, emb2)[0][0]
-    return float(similarity)
+    return normalized_similarity.cosine_similarity(
+        normalize_embeddings(embedding1).ravel(),
+        normalize_embeddings(embedding2).ravel()
+    )
 
 
 def calculate_similarity_matrix(embeddings: List[np.ndarray]) -> np.ndarray:
@@ -31,8 +35,7 @@ def calculate_similarity_matrix(embeddings: List[np.ndarray]) -> np.ndarray:
     Returns:
         Similarity matrix (n x n)
     """
-    embeddings_array = np.array(embeddings)
-    return cosine_similarity(embeddings_array)
+    return normalized_similarity.calculate_similarity_matrix(normalize_embeddings(embeddings))
 
 
 def find_most_similar(
@@ -50,16 +53,14 @@ def find_most_similar(
     Returns:
         List of (index, similarity_score) tuples, sorted by similarity descending
     """
-    similarities = []
+    if len(candidate_embeddings) == 0:
+        return []
     
-    for idx, candidate in enumerate(candidate_embeddings):
-        similarity = calculate_cosine_similarity(query_embedding, candidate)
-        similarities.append((idx, similarity))
-    
-    # Sort by similarity descending
-    similarities.sort(key=lambda x: x[1], reverse=True)
-    
-    return similarities[:top_k]
+    return normalized_similarity.find_most_similar(
+        normalize_embeddings(query_embedding).ravel(),
+        normalize_embeddings(candidate_embeddings),
+        top_k
+    )
 
 
 def average_embeddings(embeddings: List[np.ndarray], weights: List[float] = None) -> np.ndarray:
@@ -83,43 +84,53 @@ def average_embeddings(embeddings: List[np.ndarray], weights: List[float] = None
 
 
 def find_intersection_preferences(
-    user1_embeddings: List[np.ndarray],
-    user2_embeddings: List[np.ndarray],
-    catalog_embeddings: List[np.ndarray],
+    user1_embeddings: Union[List[np.ndarray], np.ndarray],
+    user2_embeddings: Union[List[np.ndarray], np.ndarray],
+    catalog_embeddings: Union[List[np.ndarray], np.ndarray],
     threshold: float = 0.7,
-    top_k: int = 20
+    top_k: int = 20,
+    normalized: bool = False
 ) -> List[Tuple[int, float]]:
     """Find movies that match both users' preferences.
     
     Args:
         user1_embeddings: Embeddings of movies liked by user 1
         user2_embeddings: Embeddings of movies liked by user 2
-        catalog_embeddings: All movie embeddings in catalog
+        catalog_embeddings: Candidate embeddings, as a list or a precomputed (N x D) matrix
         threshold: Minimum similarity threshold
         top_k: Number of results to return
-        
+        normalized: Candidate embeddings are already L2-normalized
+    
     Returns:
         List of (catalog_index, combined_score) tuples
     """
-    # Calculate average preference for each user
-    user1_avg = average_embeddings(user1_embeddings)
-    user2_avg = average_embeddings(user2_embeddings)
+    candidates = np.asarray(catalog_embeddings, dtype=np.float32)
+    if candidates.size == 0 or top_k <= 0:
+        return []
     
-    # Calculate combined similarity for each catalog movie
-    results = []
+    # Calculate average preference for each user, normalized once
+    user_avgs = normalize_embeddings(np.vstack([
+        average_embeddings(user1_embeddings),
+        average_embeddings(user2_embeddings)
+    ]))
+    if user_avgs.shape[1] != candidates.shape[1]:
+        raise ValueError(f"Embedding dimensions differ: users {user_avgs.shape[1]}, "
+                         f"candidates {candidates.shape[1]} (mixed full and reduced vectors?)")
     
-    for idx, catalog_emb in enumerate(catalog_embeddings):
-        sim1 = calculate_cosine_similarity(user1_avg, catalog_emb)
-        sim2 = calculate_cosine_similarity(user2_avg, catalog_emb)
-        
-        # Only include if both similarities are above threshold
-        if sim1 >= threshold and sim2 >= threshold:
-            # Combined score (average of both similarities)
-            combined_score = (sim1 + sim2) / 2
-            results.append((idx, combined_score))
+    # Both similarities for every candidate in one product (zero vectors score 0)
+    if not normalized:
+        candidates = normalize_embeddings(candidates)
+    similarities = candidates @ user_avgs.T
     
-    # Sort by combined score descending
-    results.sort(key=lambda x: x[1], reverse=True)
+    # Only include if both similarities are above threshold
+    matches = np.flatnonzero((similarities >= threshold).all(axis=1))
+    if len(matches) == 0:
+        return []
     
-    return results[:top_k]
-
+    # Combined score (average of both similarities)
+    scores = similarities[matches].mean(axis=1)
+    
+    # Best combined scores first, ties by candidate position
+    order = top_k_indices(scores, top_k, keys=matches)
+    
+    return [(int(matches[i]), float(scores[i])) for i in order]
@@ -0,0 +1,96 @@
+"""Token estimates and token-budget batching for embedding requests.
+
+Uses tiktoken when it is installed; otherwise a conservative estimate from
+the UTF-8 length (Cyrillic text takes ~2 bytes per character and
+cl100k_base averages well over 4 bytes per token on it).
+"""
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+
+@lru_cache(maxsize=8)
+def _encoding(model: str):
+    """Get tiktoken encoding for a model, or None if tiktoken is unavailable."""
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding('cl100k_base')
+
+
+def estimate_tokens(text: str, model: str) -> int:
+    """Estimate number of tokens of a text.
+    
+    Args:
+        text: Input text
+        model: Embedding model name
+    
+    Returns:
+        Token count (exact with tiktoken, an upper-side estimate without)
+    """
+    encoding = _encoding(model)
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return len(text.encode('utf-8')) // 4 + 1
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str) -> str:
+    """Cut a text to fit a token limit.
+    
+    Args:
+        text: Input text
+        max_tokens: Token limit
+        model: Embedding model name
+    
+    Returns:
+        Text itself if it fits, otherwise its longest prefix that fits
+    """
+    encoding = _encoding(model)
+    if encoding is not None:
+        tokens = encoding.encode(text)
+        return text if len(tokens) <= max_tokens else encoding.decode(tokens[:max_tokens])
+    
+    if estimate_tokens(text, model) <= max_tokens:
+        return text
+    
+    # Estimate is linear in UTF-8 bytes: cut bytes, drop a split trailing character
+    return text.encode('utf-8')[:(max_tokens - 1) * 4].decode('utf-8', errors='ignore')
+
+
+def plan_batches(
+    token_counts: List[int],
+    max_batch_tokens: Optional[int],
+    max_batch_items: int
+) -> List[Tuple[int, int]]:
+    """Split a sequence of inputs into contiguous request batches.
+    
+    A batch is closed when adding the next input would exceed either the
+    token budget or the item limit, so short texts are packed densely and
+    long ones never push a request over the limit.
+    
+    Args:
+        token_counts: Token count per input, in order
+        max_batch_tokens: Token budget per request (None for no budget)
+        max_batch_items: Maximum inputs per request
+    
+    Returns:
+        List of (start, end) ranges covering all inputs in order
+    """
+    batches = []
+    start, batch_tokens = 0, 0
+    
+    for i, tokens in enumerate(token_counts):
+        over_budget = max_batch_tokens is not None and batch_tokens + tokens > max_batch_tokens
+        if i > start and (over_budget or i - start >= max_batch_items):
+            batches.append((start, i))
+            start, batch_tokens = i, 0
+        batch_tokens += tokens
+    
+    if start < len(token_counts):
+        batches.append((start, len(token_counts)))
+    
+    return batches
@@ -1,24 +1,167 @@
 """Vector store for caching and retrieving movie embeddings."""
+import hashlib
+import json
+import os
 import pickle
+import re
+import struct
+import tempfile
 import numpy as np
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
 from pathlib import Path
+from embeddings.ann_index import IVFIndex
+from embeddings.normalized_similarity import normalize_embeddings
+from embeddings.providers import configured_model_name
+from embeddings import quantization
+from embeddings.reduction import PCAProjection
+from embeddings.ranking import top_k_indices
 import config
 
 
+# Bump when the on-disk layout changes; older caches are then ignored
+# 1 - raw vectors, 2 - L2-normalized vectors
+CACHE_FORMAT_VERSION = 2
+
+# Checkpoint journal record: header length, payload length (little-endian)
+_JOURNAL_FRAME = struct.Struct('<II')
+
+# Default of VectorStore(reduced_dimension=...): take it from config (None means no reduction)
+_FROM_CONFIG = object()
+
+# Process umask, so atomically written files get the mode a plain open() would give them
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+# Exact search copies out the allowed rows only when they are under this share of the store;
+# above it, scoring the whole matrix and masking the rest is cheaper than the copy
+_GATHER_FRACTION = 0.25
+
+
+def _atomic_write(path: Path, write: Callable):
+    """Write a file via temp file plus rename.
+    
+    Args:
+        path: Destination path
+        write: Callback receiving the open binary temp file
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o666 & ~_UMASK)  # mkstemp creates owner-only files
+        os.replace(tmp_path, path)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+
+
+def content_hash(text: str, model_name: str) -> str:
+    """Hash the text an embedding was made from, tagged with the model.
+    
+    Args:
+        text: Embedded text (movie description)
+        model_name: Embedding model name
+    
+    Returns:
+        Hex digest; changes whenever the text or the model changes
+    """
+    return hashlib.sha256(f"{model_name}\n{text}".encode('utf-8')).hexdigest()
+
+
 class VectorStore:
-    """Manages storage and retrieval of movie embeddings."""
+    """Manages storage and retrieval of movie embeddings.
     
-    def __init__(self, cache_path: str = None):
+    Embeddings are kept in a single contiguous float32 matrix (one row per
+    movie) together with a movie_index -> row map, so a query is scored
+    against the whole catalog with one matrix-vector product. Rows are
+    L2-normalized when added, so cosine similarity is a plain dot product.
+    
+    In 'float16' / 'int8' storage modes a compressed copy of the matrix is
+    kept in memory for a coarse pass, and only the best candidates are
+    re-ranked against the full-precision rows, which stay memory-mapped
+    from the disk cache.
+    
+    With a reduced dimension, search runs on PCA projections of the rows
+    and queries. The projection is fitted on the catalog and persisted
+    next to the cache; full-dimension vectors stay the stored source.
+    """
+    
+    def __init__(
+        self,
+        cache_path: str = None,
+        model_name: str = None,
+        storage: str = None,
+        reduced_dimension: Optional[int] = _FROM_CONFIG
+    ):
         """Initialize vector store.
         
         Args:
-            cache_path: Path to cache file
+            cache_path: Path to cache sidecar file (matrix is stored next to it)
+            model_name: Embedding model the vectors come from (defaults to config)
+            storage: 'float32', 'float16' or 'int8' (defaults to config)
+            reduced_dimension: Search in a PCA-reduced space of this dimension;
+                None or 0 - full dimension (defaults to config when
+                EMBEDDING_REDUCTION is 'pca')
         """
         self.cache_path = cache_path or config.EMBEDDINGS_CACHE_PATH
-        self.embeddings: Dict[int, np.ndarray] = {}  # movie_index -> embedding
+        self.model_name = model_name or configured_model_name()
+        self.storage = storage or config.EMBEDDING_STORAGE
+        
+        if reduced_dimension is _FROM_CONFIG:
+            reduced_dimension = config.EMBEDDING_REDUCED_DIMENSION if config.EMBEDDING_REDUCTION == 'pca' else None
+        self.reduced_dimension = reduced_dimension or None
+        
+        if self.storage not in quantization.STORAGE_MODES:
+            raise ValueError(f"Unknown embedding storage mode: {self.storage}")
+        
         self.metadata: Dict[int, Dict] = {}  # movie_index -> metadata
+        self.content_hashes: Dict[int, str] = {}  # movie_index -> content_hash of the embedded text
+        
+        self._matrix = np.empty((0, 0), dtype=np.float32)  # row -> normalized embedding
+        self._ids = np.empty(0, dtype=np.int64)  # row -> movie_index
+        self._row_by_index: Dict[int, int] = {}  # movie_index -> row
+        self._sorted_lookup: Optional[Tuple[np.ndarray, np.ndarray]] = None  # (sorted ids, rows) for bulk lookups
+        self._size = 0
+        self._checksum: Optional[str] = None  # checksum of the matrix, None if unknown
+        
+        self.ann_index: Optional[IVFIndex] = None  # optional approximate search index
+        
+        self._codes: Optional[np.ndarray] = None  # compressed rows for the coarse pass
+        
+        self.projection: Optional[PCAProjection] = None  # fitted lazily on first search
+        self._reduced: Optional[np.ndarray] = None  # projected rows, None if not built yet
+        self._code_scale: Optional[np.ndarray] = None  # per-dimension int8 scale
+    
+    def _reserve(self, rows: int, dimension: int):
+        """Make room for at least `rows` embeddings of given dimension.
         
+        Args:
+            rows: Required number of rows
+            dimension: Embedding dimension
+        """
+        if self._matrix.shape[1] == 0 and self._size == 0:
+            self._matrix = np.empty((0, dimension), dtype=np.float32)
+        elif self._matrix.shape[1] != dimension:
+            raise ValueError(
+                f"Embedding dimension mismatch: expected {self._matrix.shape[1]}, got {dimension}"
+            )
+        
+        capacity = self._matrix.shape[0]
+        # A matrix mapped from the cache is read-only: copy it on first write
+        if rows <= capacity and self._matrix.flags.writeable:
+            return
+        
+        new_capacity = capacity if rows <= capacity else max(rows, capacity * 2, 16)
+        
+        matrix = np.empty((new_capacity, dimension), dtype=np.float32)
+        matrix[:self._size] = self._matrix[:self._size]
+        ids = np.empty(new_capacity, dtype=np.int64)
+        ids[:self._size] = self._ids[:self._size]
+        
+        self._matrix, self._ids = matrix, ids
+    
     def add_embedding(self, movie_index: int, embedding: np.ndarray, metadata: Dict = None):
         """Add an embedding to the store.
         
@@ -27,44 +170,180 @@ class VectorStore:
             embedding: Embedding vector
             metadata: Optional metadata about the movie
         """
-        self.embeddings[movie_index] = embedding
-        
-        if metadata:
-            self.metadata[movie_index] = metadata
+        self.add_embeddings_batch([movie_index], [embedding], [metadata] if metadata else None)
     
-    def add_embeddings_batch(self, indices: List[int], embeddings: List[np.ndarray], metadata_list: List[Dict] = None):
+    def add_embeddings_batch(
+        self,
+        indices: List[int],
+        embeddings: List[np.ndarray],
+        metadata_list: List[Dict] = None,
+        content_hashes: List[str] = None
+    ):
         """Add multiple embeddings at once.
         
         Args:
             indices: List of movie indices
             embeddings: List of embedding vectors
             metadata_list: Optional list of metadata dictionaries
+            content_hashes: Optional list of content_hash values of the embedded texts
         """
-        for i, (idx, emb) in enumerate(zip(indices, embeddings)):
+        # Later duplicates overwrite earlier ones, like dict assignment
+        pending: Dict[int, int] = {}
+        for i, idx in enumerate(indices[:len(embeddings)]):
+            pending[int(idx)] = i
+            
             meta = metadata_list[i] if metadata_list and i < len(metadata_list) else None
-            self.add_embedding(idx, emb, meta)
+            if meta:
+                self.metadata[int(idx)] = meta
+            
+            if content_hashes and i < len(content_hashes):
+                self.content_hashes[int(idx)] = content_hashes[i]
+        
+        if not pending:
+            return
+        
+        # Matrix changes: cached checksum, ANN lists and codes are stale now
+        self._checksum = None
+        self._sorted_lookup = None
+        self.ann_index = None
+        self._codes = None
+        self._reduced = None
+        
+        positions = list(pending.values())
+        vectors = normalize_embeddings([np.asarray(embeddings[i]).ravel() for i in positions])
+        
+        new_ids = [idx for idx in pending if idx not in self._row_by_index]
+        self._reserve(self._size + len(new_ids), vectors.shape[1])
+        
+        for idx in new_ids:
+            self._row_by_index[idx] = self._size
+            self._ids[self._size] = idx
+            self._size += 1
+        
+        rows = np.fromiter((self._row_by_index[idx] for idx in pending), dtype=np.int64, count=len(pending))
+        self._matrix[rows] = vectors
+    
+    def remove_embeddings(self, movie_indices: Iterable[int]) -> int:
+        """Remove embeddings from the store.
+        
+        Remaining rows are compacted, keeping their relative order.
+        
+        Args:
+            movie_indices: Movie indices to remove (unknown ones are ignored)
+        
+        Returns:
+            Number of removed embeddings
+        """
+        removed_ids, rows = self._rows_for(movie_indices)
+        removed_ids = np.unique(removed_ids)
+        if len(removed_ids) == 0:
+            return 0
+        
+        keep = np.ones(self._size, dtype=bool)
+        keep[rows] = False
+        
+        # Fancy indexing copies, so a read-only memmap becomes writeable again
+        self._matrix = self._matrix[:self._size][keep]
+        self._ids = self._ids[:self._size][keep]
+        self._size = len(self._ids)
+        self._row_by_index = {idx: row for row, idx in enumerate(self._ids.tolist())}
+        
+        for idx in removed_ids.tolist():
+            self.metadata.pop(idx, None)
+            self.content_hashes.pop(idx, None)
+        
+        self._checksum = None
+        self._sorted_lookup = None
+        self.ann_index = None
+        self._codes = None
+        self._reduced = None
+        
+        return len(removed_ids)
     
     def get_embedding(self, movie_index: int) -> Optional[np.ndarray]:
         """Get embedding for a specific movie.
         
         Args:
             movie_index: Movie index
-            
+        
         Returns:
             Embedding vector or None if not found
         """
-        return self.embeddings.get(movie_index)
+        row = self._row_by_index.get(movie_index)
+        if row is None:
+            return None
+        return self._matrix[row]
     
     def get_embeddings(self, movie_indices: List[int]) -> List[np.ndarray]:
         """Get embeddings for multiple movies.
         
         Args:
             movie_indices: List of movie indices
-            
+        
         Returns:
             List of embedding vectors (None for missing indices)
         """
-        return [self.embeddings.get(idx) for idx in movie_indices]
+        return [self.get_embedding(idx) for idx in movie_indices]
+    
+    def get_embedding_matrix(self, movie_indices: List[int], reduced: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """Get embeddings for multiple movies as one matrix.
+        
+        Args:
+            movie_indices: List of movie indices
+            reduced: Return rows of the search space (PCA projections when
+                a reduced dimension is set) instead of the stored vectors
+            
+        Returns:
+            Tuple of (indices that have embeddings, embedding matrix), row-aligned
+        """
+        found, rows = self._rows_for(movie_indices)
+        matrix = self._search_matrix() if reduced and len(rows) else self._matrix
+        
+        if len(rows) == 0:
+            return found, np.empty((0, matrix.shape[1]), dtype=np.float32)
+        
+        return found, matrix[rows]
+    
+    def _rows_for(self, movie_indices: Iterable[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """Map movie indices to matrix rows in bulk.
+        
+        Args:
+            movie_indices: Movie indices (list, array or pandas Index)
+            
+        Returns:
+            Tuple of (movie indices that have embeddings, their rows), in input order
+        """
+        if not isinstance(movie_indices, np.ndarray) and not hasattr(movie_indices, 'to_numpy'):
+            movie_indices = list(movie_indices)  # sets and other iterables
+        ids = np.asarray(movie_indices, dtype=np.int64).ravel()
+        
+        if self._size == 0 or len(ids) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        
+        if self._sorted_lookup is None:
+            order = np.argsort(self._ids[:self._size], kind='stable')
+            self._sorted_lookup = (self._ids[:self._size][order], order)
+        sorted_ids, sorted_rows = self._sorted_lookup
+        
+        positions = np.minimum(np.searchsorted(sorted_ids, ids), self._size - 1)
+        found = sorted_ids[positions] == ids
+        return ids[found], sorted_rows[positions[found]]
+    
+    def rows_mask(self, movie_indices: Iterable[int]) -> np.ndarray:
+        """Build a boolean row mask from movie indices.
+        
+        Useful to turn a catalog filter (e.g. age rating or genre DataFrame
+        index) into a candidate_mask for search_similar / search_batch.
+        
+        Args:
+            movie_indices: Allowed movie indices
+            
+        Returns:
+            Boolean mask over stored rows
+        """
+        mask = np.zeros(self._size, dtype=bool)
+        mask[self._rows_for(movie_indices)[1]] = True
+        return mask
     
     def get_all_embeddings(self) -> Tuple[List[int], List[np.ndarray]]:
         """Get all stored embeddings.
@@ -72,20 +351,28 @@ class VectorStore:
         Returns:
             Tuple of (indices, embeddings)
         """
-        indices = list(self.embeddings.keys())
-        embeddings = [self.embeddings[idx] for idx in indices]
+        indices = self._ids[:self._size].tolist()
+        embeddings = list(self._matrix[:self._size])
         return indices, embeddings
     
+    def get_matrix(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Get all stored embeddings as arrays (no copy).
+        
+        Returns:
+            Tuple of (movie indices array, embedding matrix), row-aligned
+        """
+        return self._ids[:self._size], self._matrix[:self._size]
+    
     def has_embedding(self, movie_index: int) -> bool:
         """Check if embedding exists for a movie.
         
         Args:
             movie_index: Movie index
-            
+        
         Returns:
             True if embedding exists
         """
-        return movie_index in self.embeddings
+        return movie_index in self._row_by_index
     
     def size(self) -> int:
         """Get number of stored embeddings.
@@ -93,61 +380,437 @@ class VectorStore:
         Returns:
             Number of embeddings
         """
-        return len(self.embeddings)
+        return self._size
+    
+    def checksum(self) -> str:
+        """Get SHA-256 checksum of the embedding matrix.
+        
+        Returns:
+            Hex digest (cached until the matrix changes)
+        """
+        if self._checksum is None:
+            matrix = np.ascontiguousarray(self._matrix[:self._size], dtype=np.float32)
+            self._checksum = hashlib.sha256(matrix.tobytes()).hexdigest()
+        return self._checksum
+    
+    def _matrix_path(self, checksum: str) -> Path:
+        """Get path of the matrix file for a given cache version.
+        
+        Args:
+            checksum: Hex digest of the matrix contents
+        
+        Returns:
+            Path next to the sidecar, tagged with the checksum prefix
+        """
+        sidecar = Path(self.cache_path)
+        return sidecar.with_name(f"{sidecar.stem}-{checksum[:16]}.npy")
     
     def save_to_disk(self):
-        """Save embeddings to disk cache."""
+        """Save embeddings to disk cache.
+        
+        The matrix is written as a raw float32 .npy file and the sidecar
+        (ids, model, dimension, checksum) is written last. Both go through a
+        temp file plus rename, so a crash never leaves a half-written cache:
+        the old sidecar keeps pointing at the old matrix until the swap.
+        """
         try:
+            sidecar_path = Path(self.cache_path)
             # Create directory if it doesn't exist
-            Path(self.cache_path).parent.mkdir(parents=True, exist_ok=True)
+            sidecar_path.parent.mkdir(parents=True, exist_ok=True)
             
-            data = {
-                'embeddings': self.embeddings,
-                'metadata': self.metadata
+            previous = self._read_sidecar(sidecar_path)
+            
+            ids, matrix = self.get_matrix()
+            matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+            checksum = self.checksum()
+            matrix_path = self._matrix_path(checksum)
+            
+            if not matrix_path.exists():
+                _atomic_write(matrix_path, lambda f: np.save(f, matrix))
+            
+            sidecar = {
+                'format_version': CACHE_FORMAT_VERSION,
+                'model': self.model_name,
+                'dimension': int(matrix.shape[1]),
+                'count': int(matrix.shape[0]),
+                'dtype': 'float32',
+                'matrix_file': matrix_path.name,
+                'checksum': checksum,
+                'ids': ids.tolist(),
+                'metadata': {str(idx): meta for idx, meta in self.metadata.items()},
+                'content_hashes': {str(idx): h for idx, h in self.content_hashes.items()}
             }
+            payload = json.dumps(sidecar, ensure_ascii=False, default=str).encode('utf-8')
+            _atomic_write(sidecar_path, lambda f: f.write(payload))
             
-            with open(self.cache_path, 'wb') as f:
-                pickle.dump(data, f)
+            # Checkpointed rows are part of the saved matrix now
+            self._journal_path().unlink(missing_ok=True)
             
-            print(f"[+] Saved {len(self.embeddings)} embeddings to {self.cache_path}")
+            # Compressed modes keep full precision on disk only
+            if self.storage != 'float32':
+                self._matrix = np.load(matrix_path, mmap_mode='r')
             
+            print(f"[+] Saved {self._size} embeddings to {self.cache_path}")
+        
         except Exception as e:
             print(f"[!] Error saving embeddings: {e}")
+            return
+        
+        # A process that just read the previous sidecar may still open its matrix: keep that one
+        self._remove_old_matrices({matrix_path.name, (previous or {}).get('matrix_file')})
+    
+    def _remove_old_matrices(self, keep: Set[str]):
+        """Delete matrix files of older cache versions, best effort.
+        
+        Files that cannot be removed (still mapped by a process on Windows)
+        are left for a later save.
+        
+        Args:
+            keep: Names of matrix files to keep
+        """
+        sidecar = Path(self.cache_path)
+        pattern = re.compile(re.escape(sidecar.stem) + r'-[0-9a-f]{16}\.npy')
+        for path in sidecar.parent.iterdir():
+            if path.name not in keep and pattern.fullmatch(path.name):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+    
+    @staticmethod
+    def _read_sidecar(sidecar_path: Path) -> Optional[Dict]:
+        """Read cache sidecar if present and readable."""
+        try:
+            with open(sidecar_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
     
-    def load_from_disk(self) -> bool:
+    def load_from_disk(self, verify_checksum: bool = False) -> bool:
         """Load embeddings from disk cache.
         
+        The matrix is opened with np.memmap, so loading does not copy the
+        catalog into process memory and worker processes share one
+        page-cache copy. Batches checkpointed by an interrupted build are
+        replayed on top and folded into a new cache version.
+        
+        Args:
+            verify_checksum: Re-hash the matrix and compare with the sidecar
+        
         Returns:
             True if loaded successfully, False otherwise
         """
         try:
-            if not Path(self.cache_path).exists():
+            sidecar_path = Path(self.cache_path)
+            if not sidecar_path.exists():
+                if self._load_legacy_pickle():
+                    return True
+                # An interrupted first build leaves only checkpoints behind
+                self.clear()
+                if self._replay_journal():
+                    self.save_to_disk()
+                    return True
                 print(f"[i] No cache file found at {self.cache_path}")
                 return False
             
-            with open(self.cache_path, 'rb') as f:
-                data = pickle.load(f)
+            sidecar = self._read_sidecar(sidecar_path)
+            if sidecar is None:
+                print(f"[!] Cache sidecar at {self.cache_path} is unreadable")
+                return False
             
-            self.embeddings = data.get('embeddings', {})
-            self.metadata = data.get('metadata', {})
+            format_version = sidecar.get('format_version')
+            if format_version not in (1, CACHE_FORMAT_VERSION):
+                print(f"[i] Cache format {format_version} is not supported, ignoring cache")
+                return False
             
-            print(f"[+] Loaded {len(self.embeddings)} embeddings from cache")
-            return True
+            if sidecar.get('model') != self.model_name:
+                print(f"[i] Cache was built with {sidecar.get('model')}, not {self.model_name}, ignoring cache")
+                return False
+            
+            matrix = np.load(sidecar_path.with_name(sidecar['matrix_file']), mmap_mode='r')
+            ids = np.asarray(sidecar['ids'], dtype=np.int64)
+            
+            if (matrix.dtype != np.float32 or matrix.ndim != 2
+                    or matrix.shape != (sidecar['count'], sidecar['dimension'])
+                    or len(ids) != matrix.shape[0]):
+                print("[!] Cache matrix does not match its sidecar, ignoring cache")
+                return False
+            
+            if verify_checksum and hashlib.sha256(np.ascontiguousarray(matrix).tobytes()).hexdigest() != sidecar['checksum']:
+                print("[!] Cache checksum mismatch, ignoring cache")
+                return False
+            
+            # Format 1 stored raw vectors: normalize in memory and rewrite below
+            if format_version == 1:
+                matrix = normalize_embeddings(matrix)
+            
+            self.clear()
+            self._matrix = matrix
+            self._ids = ids
+            self._row_by_index = {idx: row for row, idx in enumerate(ids.tolist())}
+            self._size = len(ids)
+            self._checksum = sidecar['checksum'] if format_version == CACHE_FORMAT_VERSION else None
+            self.metadata = {int(idx): meta for idx, meta in sidecar.get('metadata', {}).items()}
+            self.content_hashes = {int(idx): h for idx, h in sidecar.get('content_hashes', {}).items()}
+            
+            print(f"[+] Loaded {self._size} embeddings from cache")
             
+            if self._replay_journal() or format_version != CACHE_FORMAT_VERSION:
+                print(f"[i] Rewriting cache (format {CACHE_FORMAT_VERSION})")
+                self.save_to_disk()
+            
+            if self.storage != 'float32':
+                self._get_codes()
+            
+            return True
+        
         except Exception as e:
             print(f"[!] Error loading embeddings: {e}")
             return False
     
+    def _load_legacy_pickle(self) -> bool:
+        """Import a pickle cache from before the memmap format and rewrite it.
+        
+        Returns:
+            True if a legacy cache was found and loaded
+        """
+        legacy_path = Path(config.LEGACY_EMBEDDINGS_CACHE_PATH)
+        if not legacy_path.exists():
+            return False
+        
+        try:
+            with open(legacy_path, 'rb') as f:
+                data = pickle.load(f)
+        except Exception as e:
+            print(f"[!] Error loading legacy embeddings cache: {e}")
+            return False
+        
+        embeddings = data.get('embeddings', {})
+        
+        self.clear()
+        self.add_embeddings_batch(list(embeddings.keys()), list(embeddings.values()))
+        self.metadata = data.get('metadata', {})
+        
+        print(f"[+] Loaded {self._size} embeddings from legacy cache {legacy_path}")
+        self.save_to_disk()
+        return True
+    
+    def _get_codes(self) -> np.ndarray:
+        """Get compressed rows for the coarse pass, encoding them if needed.
+        
+        Returns:
+            Codes matrix (N x D, float16 or int8)
+        """
+        if self._codes is None:
+            matrix = self._search_matrix()
+            self._codes, self._code_scale = quantization.encode(matrix, self.storage)
+            
+            full_mb = self._size * matrix.shape[1] * 4 / 2**20
+            print(f"[i] {self.storage} codes: {self._codes.nbytes / 2**20:.1f} MB in memory "
+                  f"(full precision: {full_mb:.1f} MB)")
+        
+        return self._codes
+    
+    def _pca_path(self) -> Path:
+        """Get path of the persisted PCA projection next to the cache."""
+        sidecar = Path(self.cache_path)
+        return sidecar.with_name(f"{sidecar.stem}-pca.npz")
+    
+    def _reduction_active(self) -> bool:
+        """Check whether search runs in a reduced space."""
+        return (self.reduced_dimension is not None and self._size > 0
+                and self.reduced_dimension < self._matrix.shape[1])
+    
+    def _ensure_projection(self) -> PCAProjection:
+        """Load the persisted projection or fit it on the stored embeddings.
+        
+        Returns:
+            Projection from the stored dimension to reduced_dimension
+        """
+        input_dimension = self._matrix.shape[1]
+        
+        if self.projection is None:
+            projection = PCAProjection.load(self._pca_path())
+            if (projection is not None and projection.input_dimension == input_dimension
+                    and projection.dimension == self.reduced_dimension):
+                self.projection = projection
+        
+        if self.projection is None or self.projection.input_dimension != input_dimension:
+            print(f"[i] Fitting PCA projection {input_dimension} -> {self.reduced_dimension} dims...")
+            self.projection = PCAProjection(self.reduced_dimension)
+            self.projection.fit(self._matrix[:self._size])
+            try:
+                self.projection.save(self._pca_path())
+            except Exception as e:
+                print(f"[!] Error saving PCA projection: {e}")
+        
+        return self.projection
+    
+    def _search_matrix(self) -> np.ndarray:
+        """Get the rows search runs on: PCA projections or the stored vectors.
+        
+        Returns:
+            Normalized matrix (N x search dimension)
+        """
+        if not self._reduction_active():
+            return self._matrix[:self._size]
+        
+        if self._reduced is None:
+            self._reduced = self._ensure_projection().transform(self._matrix[:self._size])
+        return self._reduced
+    
+    def _search_fingerprint(self) -> str:
+        """Fingerprint of the search space: stored vectors plus projection."""
+        if not self._reduction_active():
+            return self.checksum()
+        return hashlib.sha256(f"{self.checksum()}:{self._ensure_projection().fingerprint}".encode()).hexdigest()
+    
+    def _journal_path(self) -> Path:
+        """Get path of the checkpoint journal next to the cache."""
+        sidecar = Path(self.cache_path)
+        return sidecar.with_name(f"{sidecar.stem}-journal.bin")
+    
+    def checkpoint_batch(self, indices: List[int], embeddings: List[np.ndarray], content_hashes: List[str]):
+        """Add embeddings and append them to the on-disk checkpoint journal.
+        
+        Used by long builds: every completed API batch is committed right
+        away (append + fsync), so an interrupted build resumes from the
+        last committed batch instead of starting over. The journal is
+        folded into the matrix by the next save_to_disk.
+        
+        Args:
+            indices: List of movie indices
+            embeddings: List of embedding vectors
+            content_hashes: List of content_hash values of the embedded texts
+        """
+        if not indices:
+            return
+        
+        self.add_embeddings_batch(indices, embeddings, content_hashes=content_hashes)
+        
+        _, rows = self._rows_for(indices)
+        header = json.dumps({
+            'model': self.model_name,
+            'ids': [int(idx) for idx in indices],
+            'content_hashes': list(content_hashes)
+        }).encode('utf-8')
+        payload = np.ascontiguousarray(self._matrix[rows], dtype=np.float32).tobytes()
+        
+        journal_path = self._journal_path()
+        journal_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(journal_path, 'ab') as f:
+            f.write(_JOURNAL_FRAME.pack(len(header), len(payload)) + header + payload)
+            f.flush()
+            os.fsync(f.fileno())
+    
+    def _replay_journal(self) -> bool:
+        """Apply checkpointed batches left by an interrupted build.
+        
+        A record cut short by a crash is ignored, as are records written
+        for another embedding model.
+        
+        Returns:
+            True if any embeddings were restored
+        """
+        journal_path = self._journal_path()
+        if not journal_path.exists():
+            return False
+        
+        restored = 0
+        with open(journal_path, 'rb') as f:
+            while True:
+                frame = f.read(_JOURNAL_FRAME.size)
+                if len(frame) < _JOURNAL_FRAME.size:
+                    break
+                
+                header_size, payload_size = _JOURNAL_FRAME.unpack(frame)
+                header = f.read(header_size)
+                payload = f.read(payload_size)
+                if len(header) < header_size or len(payload) < payload_size:
+                    print("[i] Ignoring incomplete checkpoint record")
+                    break
+                
+                record = json.loads(header)
+                if record['model'] != self.model_name:
+                    continue
+                
+                ids = record['ids']
+                vectors = np.frombuffer(payload, dtype=np.float32).reshape(len(ids), -1)
+                self.add_embeddings_batch(ids, vectors, content_hashes=record['content_hashes'])
+                restored += len(ids)
+        
+        if restored:
+            print(f"[+] Restored {restored} embeddings from checkpoints")
+        return restored > 0
+    
+    def discard_checkpoints(self):
+        """Delete the checkpoint journal (e.g. before a forced full rebuild)."""
+        self._journal_path().unlink(missing_ok=True)
+    
+    def _index_path(self) -> Path:
+        """Get path of the persisted ANN index next to the cache."""
+        sidecar = Path(self.cache_path)
+        return sidecar.with_name(f"{sidecar.stem}-ivf.npz")
+    
+    def ensure_ann_index(self, nlist: int = None, nprobe: int = 8, rebuild: bool = False) -> IVFIndex:
+        """Load the persisted IVF index or build it from the stored embeddings.
+        
+        Args:
+            nlist: Number of k-means lists (default: 4 * sqrt(N))
+            nprobe: Lists scanned per query (recall/latency knob)
+            rebuild: Ignore a persisted index and build a new one
+        
+        Returns:
+            Index used by search_similar from now on
+        """
+        if self._size == 0:
+            raise ValueError("Cannot build ANN index: vector store is empty")
+        
+        index_path = self._index_path()
+        index = None if rebuild else IVFIndex.load(index_path, nprobe=nprobe)
+        
+        fingerprint = self._search_fingerprint()
+        if index is not None and (index.fingerprint != fingerprint or index.size != self._size
+                                  or (nlist and index.nlist != nlist)):
+            print("[i] ANN index is stale, rebuilding")
+            index = None
+        
+        if index is None:
+            print(f"[i] Building IVF index over {self._size} embeddings...")
+            index = IVFIndex(nlist=nlist, nprobe=nprobe)
+            index.build(self._search_matrix(), fingerprint=fingerprint)
+            try:
+                index.save(index_path)
+            except Exception as e:
+                print(f"[!] Error saving ANN index: {e}")
+            print(f"[+] IVF index ready ({index.nlist} lists, nprobe={nprobe})")
+        
+        self.ann_index = index
+        return index
+    
     def clear(self):
         """Clear all embeddings from memory."""
-        self.embeddings.clear()
+        self._matrix = np.empty((0, 0), dtype=np.float32)
+        self._ids = np.empty(0, dtype=np.int64)
+        self._row_by_index.clear()
+        self._sorted_lookup = None
+        self._size = 0
+        self._checksum = None
+        self.ann_index = None
+        self._codes = None
+        self._reduced = None
+        self._code_scale = None
+        self.projection = None
         self.metadata.clear()
+        self.content_hashes.clear()
     
     def search_similar(
         self,
         query_embedding: np.ndarray,
         top_k: int = 10,
-        exclude_indices: List[int] = None
+        exclude_indices: List[int] = None,
+        candidate_indices: Iterable[int] = None,
+        candidate_mask: np.ndarray = None
     ) -> List[Tuple[int, float]]:
         """Search for similar movies using cosine similarity.
         
@@ -155,24 +818,214 @@ class VectorStore:
             query_embedding: Query embedding vector
             top_k: Number of results to return
             exclude_indices: Movie indices to exclude from results
+            candidate_indices: Only consider these movie indices
+            candidate_mask: Only consider rows where this boolean mask is True
             
         Returns:
             List of (movie_index, similarity_score) tuples
         """
-        from embeddings.similarity import calculate_cosine_similarity
+        query = np.asarray(query_embedding, dtype=np.float32).reshape(1, -1)
+        return self.search_batch(query, top_k, exclude_indices, candidate_indices, candidate_mask)[0]
+    
+    def search_batch(
+        self,
+        queries: np.ndarray,
+        top_k: int = 10,
+        exclude_indices: List[int] = None,
+        candidate_indices: Iterable[int] = None,
+        candidate_mask: np.ndarray = None
+    ) -> List[List[Tuple[int, float]]]:
+        """Search for several queries in one pass over the catalog.
+        
+        All queries are scored with a single matrix-matrix product, then
+        top-k is selected per query. With an ANN index each query probes
+        its own lists instead. Candidate constraints are applied inside the
+        scan, so a filtered query still costs a single pass.
+        
+        Args:
+            queries: Query embeddings (Q x D, or Q x reduced dimension)
+            top_k: Number of results per query
+            exclude_indices: Movie indices to exclude from every result
+            candidate_indices: Only consider these movie indices
+            candidate_mask: Only consider rows where this boolean mask is True
+                (row-aligned, see rows_mask)
+            
+        Returns:
+            One list of (movie_index, similarity_score) tuples per query
+        """
+        queries = normalize_embeddings(np.atleast_2d(queries))
+        
+        if self._size == 0 or top_k <= 0:
+            return [[] for _ in range(len(queries))]
+        
+        # Full-dimension queries are projected; already reduced ones are used as is
+        if self._reduction_active() and queries.shape[1] == self._matrix.shape[1]:
+            queries = self._ensure_projection().transform(queries)
         
-        exclude_set = set(exclude_indices or [])
-        similarities = []
+        keep = self._keep_mask(exclude_indices, candidate_indices, candidate_mask)
+        candidate_count = self._size if keep is None else int(np.count_nonzero(keep))
         
-        for movie_idx, movie_emb in self.embeddings.items():
-            if movie_idx in exclude_set:
+        if self.ann_index is None and self.storage != 'float32':
+            return self._search_compressed(queries, keep, candidate_count, top_k)
+        
+        if self.ann_index is None:
+            return self._search_exact(queries, keep, candidate_count, top_k)
+        
+        # Under a filter the k best candidates rank about k * N / candidates overall, which takes
+        # about the square of that factor more lists to reach. Once such a probe would touch as
+        # many rows as there are candidates, scanning the candidates directly is cheaper and exact
+        index = self.ann_index
+        nprobe = index.nprobe
+        if candidate_count < self._size:
+            widening = (self._size / max(candidate_count, 1)) ** 2
+            nprobe = min(index.nlist, round(index.nprobe * widening))
+            if candidate_count <= self._size * nprobe / index.nlist:
+                return self._search_exact(queries, keep, candidate_count, top_k)
+        
+        results = []
+        for query in queries:
+            candidates = index.probe(query, nprobe=nprobe)
+            if keep is not None:
+                candidates = candidates[keep[candidates]]
+            
+            # Too few rows in the probed lists: fall back to the exact scan
+            if len(candidates) < top_k:
+                results.extend(self._search_exact(query[np.newaxis], keep, candidate_count, top_k))
                 continue
             
-            similarity = calculate_cosine_similarity(query_embedding, movie_emb)
-            similarities.append((movie_idx, similarity))
+            scores = self._cosine_scores(query[np.newaxis], candidates)[0]
+            results.append(self._top_results(candidates, scores, top_k))
         
-        # Sort by similarity descending
-        similarities.sort(key=lambda x: x[1], reverse=True)
+        return results
+    
+    def _search_exact(
+        self,
+        queries: np.ndarray,
+        keep: Optional[np.ndarray],
+        candidate_count: int,
+        top_k: int
+    ) -> List[List[Tuple[int, float]]]:
+        """Score every allowed row against the queries.
         
-        return similarities[:top_k]
-
+        Args:
+            queries: Normalized query embeddings (Q x D)
+            keep: Boolean row mask of allowed rows (None for all)
+            candidate_count: Number of allowed rows
+            top_k: Number of results per query
+            
+        Returns:
+            One list of (movie_index, similarity_score) tuples per query
+        """
+        if candidate_count == 0:
+            return [[] for _ in range(len(queries))]
+        
+        if keep is not None and candidate_count < self._size * _GATHER_FRACTION:
+            rows = np.flatnonzero(keep)
+            score_rows = self._cosine_scores(queries, rows)
+        else:
+            rows = np.arange(self._size)
+            score_rows = self._cosine_scores(queries)
+            if keep is not None:
+                score_rows[:, ~keep] = -np.inf  # never selected: top_k is capped at the allowed count
+        
+        top_k = min(top_k, candidate_count)
+        return [self._top_results(rows, scores, top_k) for scores in score_rows]
+    
+    def _keep_mask(
+        self,
+        exclude_indices: Optional[List[int]],
+        candidate_indices: Optional[Iterable[int]],
+        candidate_mask: Optional[np.ndarray]
+    ) -> Optional[np.ndarray]:
+        """Combine search constraints into one boolean row mask.
+        
+        Returns:
+            Mask of allowed rows, or None if every row is allowed
+        """
+        keep = None
+        
+        if candidate_mask is not None:
+            keep = np.array(candidate_mask, dtype=bool)
+            if keep.shape != (self._size,):
+                raise ValueError(f"candidate_mask must have {self._size} entries, got {keep.shape}")
+        
+        if candidate_indices is not None:
+            allowed = self.rows_mask(candidate_indices)
+            keep = allowed if keep is None else keep & allowed
+        
+        if exclude_indices:
+            if keep is None:
+                keep = np.ones(self._size, dtype=bool)
+            keep[self._rows_for(exclude_indices)[1]] = False
+        
+        return keep
+    
+    def _search_compressed(
+        self,
+        queries: np.ndarray,
+        keep: Optional[np.ndarray],
+        candidate_count: int,
+        top_k: int
+    ) -> List[List[Tuple[int, float]]]:
+        """Coarse pass on compressed codes, then exact re-rank.
+        
+        Args:
+            queries: Normalized query embeddings (Q x D)
+            keep: Boolean row mask of allowed rows (None for all)
+            candidate_count: Number of allowed rows
+            top_k: Number of results per query
+            
+        Returns:
+            One list of (movie_index, similarity_score) tuples per query
+        """
+        if candidate_count == 0:
+            return [[] for _ in range(len(queries))]
+        
+        coarse = quantization.coarse_scores(queries, self._get_codes(), self._code_scale)
+        if keep is not None:
+            coarse[:, ~keep] = -np.inf
+        
+        shortlist = min(top_k * config.RERANK_FACTOR, candidate_count)
+        
+        results = []
+        for query, row_scores in zip(queries, coarse):
+            # Masked rows score -inf, so they never make the shortlist
+            rows = np.sort(top_k_indices(row_scores, shortlist))
+            
+            # Exact scores from full-precision rows (memory-mapped reads)
+            exact = self._search_matrix()[rows] @ query
+            results.append(self._top_results(rows, exact, top_k))
+        
+        return results
+    
+    def _top_results(self, rows: np.ndarray, scores: np.ndarray, top_k: int) -> List[Tuple[int, float]]:
+        """Pick top-k rows by score.
+        
+        Args:
+            rows: Candidate row ids
+            scores: Score per candidate
+            top_k: Number of results
+            
+        Returns:
+            List of (movie_index, similarity_score) tuples
+        """
+        movie_ids = self._ids[rows]
+        order = top_k_indices(scores, top_k, keys=movie_ids)
+        return [(int(movie_ids[i]), float(scores[i])) for i in order]
+    
+    def _cosine_scores(self, queries: np.ndarray, rows: np.ndarray = None) -> np.ndarray:
+        """Score rows against queries with one matrix-matrix product.
+        
+        Args:
+            queries: Normalized query embeddings (Q x D, float32)
+            rows: Sorted row ids to score (None for the whole matrix, without a copy)
+            
+        Returns:
+            Cosine similarity matrix (Q x len(rows)); zero vectors score 0
+        """
+        matrix = self._search_matrix()
+        if rows is not None:
+            matrix = matrix[rows]
+        
+        # (N x D) @ (D x Q): BLAS handles a few queries much faster in this order than as Q x N
+        return (matrix @ queries.T).T
@@ -87,11 +87,15 @@ def initialize_system():
     print("[i] Загрузка embeddings...")
     engine.initialize_embeddings()
     
+    # Hot reload: a changed catalog file is picked up without a restart
+    if config.CATALOG_WATCH_INTERVAL:
+        engine.watch_catalog()
+    
     # Initialize session manager
     session_manager = SessionManager(db_manager, engine)
     
     # Initialize UI
-    ui = ConsoleUI(catalog)
+    ui = ConsoleUI(engine)
     
     print("[+] Система готова!\n")
     
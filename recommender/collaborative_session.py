@@ -1,7 +1,9 @@
 """Collaborative recommendation session for two users (30-30-40 split)."""
 import numpy as np
+import pandas as pd
 from typing import List, Dict, Tuple
 from embeddings.similarity import find_intersection_preferences
+from embeddings.normalized_similarity import average_embeddings
 from recommender.recommendation_engine import RecommendationEngine
 from recommender.content_filter import ContentFilter
 import config
@@ -17,7 +19,11 @@ class CollaborativeSession:
             recommendation_engine: Recommendation engine instance
         """
         self.engine = recommendation_engine
-        self.content_filter = ContentFilter(recommendation_engine.catalog.df)
+    
+    @property
+    def content_filter(self) -> ContentFilter:
+        """Content filter of the engine's current catalog snapshot."""
+        return self.engine.content_filter
     
     def get_collaborative_recommendations(
         self,
@@ -39,7 +45,7 @@ class CollaborativeSession:
             user1_disliked_movies: Movies user 1 disliked
             user2_disliked_movies: Movies user 2 disliked
             total_count: Total number of recommendations (default from config)
-            
+        
         Returns:
             Dictionary with 'user1', 'user2', and 'intersection' movie lists
         """
@@ -58,31 +64,52 @@ class CollaborativeSession:
         all_rated = (user1_liked_movies + user2_liked_movies + 
                     user1_disliked + user2_disliked)
         
-        # Get recommendations for user 1
-        user1_recs = self._get_user_specific_recommendations(
-            user1_preferences,
-            user1_liked_movies,
-            all_rated,
-            user1_count
-        )
-        
-        # Get recommendations for user 2
-        user2_recs = self._get_user_specific_recommendations(
-            user2_preferences,
-            user2_liked_movies,
-            all_rated,
-            user2_count
-        )
-        
-        # Get intersection recommendations
-        intersection_recs = self._get_intersection_recommendations(
-            user1_preferences,
-            user2_preferences,
-            user1_liked_movies,
-            user2_liked_movies,
-            all_rated,
-            intersection_count
-        )
+        # One snapshot for the whole request, even if the catalog is reloaded meanwhile
+        with self.engine.pinned():
+            # Run every semantic search of this request in one pass over the catalog
+            user1_query = self.engine.create_preferences_embedding(user1_preferences)
+            user2_query = self.engine.create_preferences_embedding(user2_preferences)
+            
+            searches = self._search_all(
+                {
+                    'user1_preferences': user1_query,
+                    'user1_liked': self.engine.get_liked_centroid(user1_liked_movies),
+                    'user2_preferences': user2_query,
+                    'user2_liked': self.engine.get_liked_centroid(user2_liked_movies),
+                    'intersection': average_embeddings([user1_query, user2_query])
+                },
+                all_rated,
+                max(user1_count, user2_count, intersection_count)
+            )
+            
+            # Get recommendations for user 1
+            user1_recs = self._get_user_specific_recommendations(
+                user1_preferences,
+                user1_query,
+                searches['user1_preferences'],
+                searches['user1_liked'],
+                all_rated,
+                user1_count
+            )
+            
+            # Get recommendations for user 2
+            user2_recs = self._get_user_specific_recommendations(
+                user2_preferences,
+                user2_query,
+                searches['user2_preferences'],
+                searches['user2_liked'],
+                all_rated,
+                user2_count
+            )
+            
+            # Get intersection recommendations
+            intersection_recs = self._get_intersection_recommendations(
+                user1_liked_movies,
+                user2_liked_movies,
+                searches['intersection'],
+                all_rated,
+                intersection_count
+            )
         
         return {
             'user1': user1_recs,
@@ -90,10 +117,40 @@ class CollaborativeSession:
             'intersection': intersection_recs
         }
     
+    def _search_all(
+        self,
+        queries: Dict[str, np.ndarray],
+        exclude_movies: List[int],
+        top_k: int
+    ) -> Dict[str, List[Tuple[int, float]]]:
+        """Run named semantic searches as one batch.
+        
+        Args:
+            queries: Query name -> embedding (None entries are skipped)
+            exclude_movies: Movies to exclude
+            top_k: Number of results per query
+        
+        Returns:
+            Query name -> list of (movie_index, score) tuples ([] for skipped queries)
+        """
+        names = [name for name, query in queries.items() if query is not None]
+        
+        results = self.engine.vector_store.search_batch(
+            np.vstack([queries[name] for name in names]),
+            top_k=top_k,
+            exclude_indices=exclude_movies
+        )
+        
+        searches = {name: [] for name in queries}
+        searches.update(zip(names, results))
+        return searches
+    
     def _get_user_specific_recommendations(
         self,
         preferences: Dict,
-        liked_movies: List[int],
+        query_embedding: np.ndarray,
+        pref_recs: List[Tuple[int, float]],
+        liked_recs: List[Tuple[int, float]],
         exclude_movies: List[int],
         count: int
     ) -> List[Tuple[int, float]]:
@@ -101,10 +158,12 @@ class CollaborativeSession:
         
         Args:
             preferences: User preferences
-            liked_movies: Movies user liked
+            query_embedding: Embedding of user preferences
+            pref_recs: Batched search results by preferences
+            liked_recs: Batched search results by liked movies
             exclude_movies: Movies to exclude
             count: Number of recommendations
-            
+        
         Returns:
             List of (movie_index, score) tuples
         """
@@ -123,61 +182,52 @@ class CollaborativeSession:
         # Filter by actor if specified
         if specific_actor:
             actor_movies = self.content_filter.filter_by_actor(specific_actor)
-            actor_indices = [idx for idx in actor_movies.index if idx not in exclude_movies]
             
-            if len(actor_indices) >= count:
-                # Get embeddings and rank
+            if (~actor_movies.index.isin(exclude_movies)).sum() >= count:
+                # Rank all of the actor's movies by preferences
                 return self._rank_by_preferences(
-                    actor_indices[:count * 2],
-                    preferences,
-                    liked_movies,
+                    actor_movies.index,
+                    query_embedding,
+                    exclude_movies,
                     count
                 )
         
         # Filter by director if specified
         if specific_director:
-            director_movies = self.content_filter.catalog_df[
-                self.content_filter.catalog_df['director'].str.contains(
-                    specific_director, case=False, na=False
-                )
-            ]
-            director_indices = [idx for idx in director_movies.index if idx not in exclude_movies]
+            director_movies = self.content_filter.filter_by_director(specific_director)
             
-            if len(director_indices) >= count:
+            if (~director_movies.index.isin(exclude_movies)).sum() >= count:
                 return self._rank_by_preferences(
-                    director_indices[:count * 2],
-                    preferences,
-                    liked_movies,
+                    director_movies.index,
+                    query_embedding,
+                    exclude_movies,
                     count
                 )
         
         # Fall back to general recommendations
-        return self.engine.refine_recommendations(
-            preferences,
-            liked_movies,
-            [],
-            top_k=count
+        return self.engine.combine_recommendations(
+            pref_recs[:count],
+            liked_recs[:count],
+            count
         )
     
     def _get_intersection_recommendations(
         self,
-        user1_preferences: Dict,
-        user2_preferences: Dict,
         user1_liked_movies: List[int],
         user2_liked_movies: List[int],
+        combined_recs: List[Tuple[int, float]],
         exclude_movies: List[int],
         count: int
     ) -> List[Tuple[int, float]]:
         """Get intersection recommendations that both users might like.
         
         Args:
-            user1_preferences: User 1 preferences
-            user2_preferences: User 2 preferences
             user1_liked_movies: Movies user 1 liked
             user2_liked_movies: Movies user 2 liked
+            combined_recs: Batched search results for both users' preferences
             exclude_movies: Movies to exclude
             count: Number of recommendations
-            
+        
         Returns:
             List of (movie_index, score) tuples
         """
@@ -194,42 +244,25 @@ class CollaborativeSession:
         
         # Filter movies by common genres
         genre_movies = self.content_filter.filter_by_genres_intersection(common_genres)
-        candidate_indices = [idx for idx in genre_movies.index if idx not in exclude_movies]
+        candidate_indices = genre_movies.index[~genre_movies.index.isin(exclude_movies)].tolist()
         
         if not candidate_indices:
-            # Fallback: combine preferences
-            combined_prefs = self._combine_preferences(user1_preferences, user2_preferences)
-            return self.engine.get_recommendations_by_preferences(
-                combined_prefs,
-                top_k=count,
-                exclude_indices=exclude_movies
-            )
-        
-        # Get embeddings for both users' liked movies
-        user1_embeddings = [
-            self.engine.vector_store.get_embedding(idx)
-            for idx in user1_liked_movies
-            if self.engine.vector_store.has_embedding(idx)
-        ]
+            # Fallback: search by both users' preferences combined
+            return combined_recs[:count]
         
-        user2_embeddings = [
-            self.engine.vector_store.get_embedding(idx)
-            for idx in user2_liked_movies
-            if self.engine.vector_store.has_embedding(idx)
-        ]
+        # Get embeddings for both users' liked movies (in the search space, possibly reduced)
+        vector_store = self.engine.vector_store
+        _, user1_embeddings = vector_store.get_embedding_matrix(user1_liked_movies, reduced=True)
+        _, user2_embeddings = vector_store.get_embedding_matrix(user2_liked_movies, reduced=True)
         
-        if not user1_embeddings or not user2_embeddings:
+        if len(user1_embeddings) == 0 or len(user2_embeddings) == 0:
             # Fallback to genre-based ranking
             return [(idx, 1.0) for idx in candidate_indices[:count]]
         
-        # Get all candidate embeddings
-        candidate_embeddings = [
-            self.engine.vector_store.get_embedding(idx)
-            for idx in candidate_indices
-        ]
-        candidate_embeddings = [emb for emb in candidate_embeddings if emb is not None]
+        # Get all candidate embeddings as one matrix
+        valid_candidate_indices, candidate_embeddings = vector_store.get_embedding_matrix(candidate_indices, reduced=True)
         
-        if not candidate_embeddings:
+        if len(candidate_embeddings) == 0:
             return []
         
         # Find movies that match both users' preferences
@@ -238,92 +271,38 @@ class CollaborativeSession:
             user2_embeddings,
             candidate_embeddings,
             threshold=config.SIMILARITY_THRESHOLD * 0.8,  # Lower threshold for intersection
-            top_k=count
+            top_k=count,
+            normalized=True
         )
         
         # Map back to original indices
-        valid_candidate_indices = [
-            idx for idx in candidate_indices
-            if self.engine.vector_store.has_embedding(idx)
-        ]
-        
-        mapped_results = [
-            (valid_candidate_indices[idx], score)
-            for idx, score in results
-            if idx < len(valid_candidate_indices)
-        ]
-        
-        return mapped_results[:count]
+        return [(int(valid_candidate_indices[idx]), score) for idx, score in results]
     
     def _rank_by_preferences(
         self,
-        candidate_indices: List[int],
-        preferences: Dict,
-        liked_movies: List[int],
+        candidate_indices: pd.Index,
+        query_embedding: np.ndarray,
+        exclude_movies: List[int],
         count: int
     ) -> List[Tuple[int, float]]:
         """Rank candidate movies by preferences.
         
+        The candidate set is applied inside the vector search, so every
+        candidate is scored in one pass.
+        
         Args:
             candidate_indices: Candidate movie indices
-            preferences: User preferences
-            liked_movies: Movies user liked
+            query_embedding: Embedding of user preferences
+            exclude_movies: Movies to exclude
             count: Number to return
             
         Returns:
             List of (movie_index, score) tuples
         """
-        # Create preference embedding
-        from ai.assistant import MovieAssistant
-        assistant = MovieAssistant()
-        query_text = assistant.create_query_embedding_text(preferences)
-        query_embedding = self.engine.embedding_manager.create_embedding(query_text)
-        
-        # Score each candidate
-        scored = []
-        for idx in candidate_indices:
-            emb = self.engine.vector_store.get_embedding(idx)
-            if emb is not None:
-                from embeddings.similarity import calculate_cosine_similarity
-                score = calculate_cosine_similarity(query_embedding, emb)
-                scored.append((idx, score))
-        
-        # Sort by score
-        scored.sort(key=lambda x: x[1], reverse=True)
-        
-        return scored[:count]
-    
-    def _combine_preferences(self, prefs1: Dict, prefs2: Dict) -> Dict:
-        """Combine two users' preferences.
-        
-        Args:
-            prefs1: User 1 preferences
-            prefs2: User 2 preferences
-            
-        Returns:
-            Combined preferences
-        """
-        combined = {}
-        
-        # Combine lists
-        for key in ['actors', 'directors', 'genres', 'themes']:
-            items1 = prefs1.get(key, [])
-            items2 = prefs2.get(key, [])
-            
-            if isinstance(items1, str):
-                items1 = [items1]
-            if isinstance(items2, str):
-                items2 = [items2]
-            
-            combined[key] = list(set(items1 + items2))
-        
-        # Combine other fields
-        if prefs1.get('mood') and prefs2.get('mood'):
-            combined['mood'] = f"{prefs1['mood']}, {prefs2['mood']}"
-        elif prefs1.get('mood'):
-            combined['mood'] = prefs1['mood']
-        elif prefs2.get('mood'):
-            combined['mood'] = prefs2['mood']
-        
-        return combined
+        return self.engine.vector_store.search_similar(
+            query_embedding,
+            top_k=count,
+            exclude_indices=exclude_movies,
+            candidate_indices=candidate_indices
+        )
 
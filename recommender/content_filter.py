@@ -1,64 +1,59 @@
 """Content filtering for movie recommendations."""
+import numpy as np
 import pandas as pd
 from typing import List, Dict, Optional
+from catalog.inverted_index import CatalogIndex
+import config
 
 
 class ContentFilter:
     """Filters movies based on various criteria."""
     
-    def __init__(self, catalog_df: pd.DataFrame):
+    def __init__(self, catalog_df: pd.DataFrame, index: Optional[CatalogIndex] = None):
         """Initialize content filter.
         
         Args:
             catalog_df: Movie catalog DataFrame
+            index: Name indexes of the same DataFrame (built if not given)
         """
         self.catalog_df = catalog_df
+        self._index = index
+    
+    @property
+    def index(self) -> CatalogIndex:
+        """Name indexes of catalog_df (built on first use)."""
+        if self._index is None or self._index.df is not self.catalog_df:
+            self._index = CatalogIndex(self.catalog_df)
+        return self._index
     
     def filter_by_preferences(self, preferences: Dict) -> pd.DataFrame:
         """Filter movies by user preferences.
         
+        Actor and director names nothing in the catalog contains are
+        matched to the closest catalog names (typos, transliteration).
+        
         Args:
             preferences: Dictionary with user preferences
             
         Returns:
             Filtered DataFrame
         """
-        filtered_df = self.catalog_df.copy()
-        
-        # Filter by actors
-        if preferences.get('actors'):
-            actors = preferences['actors']
-            if isinstance(actors, str):
-                actors = [actors]
-            
-            mask = pd.Series([False] * len(filtered_df))
-            for actor in actors:
-                mask |= filtered_df['actors'].str.contains(actor, case=False, na=False)
-            filtered_df = filtered_df[mask]
-        
-        # Filter by directors
-        if preferences.get('directors'):
-            directors = preferences['directors']
-            if isinstance(directors, str):
-                directors = [directors]
+        rows = None
+        
+        # Any of the names within a category, every given category
+        for key, column in (('actors', 'actors'), ('directors', 'director'), ('genres', 'genres')):
+            names = preferences.get(key)
+            if not names:
+                continue
+            if isinstance(names, str):
+                names = [names]
             
-            mask = pd.Series([False] * len(filtered_df))
-            for director in directors:
-                mask |= filtered_df['director'].str.contains(director, case=False, na=False)
-            filtered_df = filtered_df[mask]
-        
-        # Filter by genres
-        if preferences.get('genres'):
-            genres = preferences['genres']
-            if isinstance(genres, str):
-                genres = [genres]
-            
-            mask = pd.Series([False] * len(filtered_df))
-            for genre in genres:
-                mask |= filtered_df['genres'].str.contains(genre, case=False, na=False)
-            filtered_df = filtered_df[mask]
+            matches = self.index.rows_any(column, names, fuzzy=config.FUZZY_NAME_MATCHING)
+            rows = matches if rows is None else np.intersect1d(rows, matches, assume_unique=True)
         
-        return filtered_df
+        if rows is None:
+            return self.catalog_df.copy()
+        return self.catalog_df.iloc[rows]
     
     def exclude_rated_movies(self, movie_indices: List[int]) -> pd.DataFrame:
         """Exclude already rated movies.
@@ -94,20 +89,29 @@ class ContentFilter:
         Returns:
             Filtered DataFrame
         """
-        mask = self.catalog_df['genres'].str.contains(genre, case=False, na=False)
-        return self.catalog_df[mask]
+        return self.catalog_df.iloc[self.index.rows('genres', genre)]
     
     def filter_by_actor(self, actor: str) -> pd.DataFrame:
         """Filter by specific actor.
         
         Args:
-            actor: Actor name
+            actor: Actor name (fuzzy-matched if nothing contains it)
             
         Returns:
             Filtered DataFrame
         """
-        mask = self.catalog_df['actors'].str.contains(actor, case=False, na=False)
-        return self.catalog_df[mask]
+        return self.catalog_df.iloc[self.index.rows('actors', actor, fuzzy=config.FUZZY_NAME_MATCHING)]
+    
+    def filter_by_director(self, director: str) -> pd.DataFrame:
+        """Filter by specific director.
+        
+        Args:
+            director: Director name (fuzzy-matched if nothing contains it)
+            
+        Returns:
+            Filtered DataFrame
+        """
+        return self.catalog_df.iloc[self.index.rows('director', director, fuzzy=config.FUZZY_NAME_MATCHING)]
     
     def get_genre_intersection(self, genres1: List[str], genres2: List[str]) -> List[str]:
         """Get intersection of two genre lists.
@@ -135,11 +139,7 @@ class ContentFilter:
         if not genres:
             return pd.DataFrame()
         
-        mask = pd.Series([False] * len(self.catalog_df))
-        for genre in genres:
-            mask |= self.catalog_df['genres'].str.contains(genre, case=False, na=False)
-        
-        return self.catalog_df[mask]
+        return self.catalog_df.iloc[self.index.rows_any('genres', genres)]
     
     def extract_genres_from_movies(self, movie_indices: List[int]) -> List[str]:
         """Extract all genres from given movies.
@@ -1,12 +1,18 @@
 """Main recommendation engine."""
+import threading
 import numpy as np
-from typing import List, Dict, Tuple
+from contextlib import contextmanager
+from typing import Iterable, List, Dict, Optional, Tuple
 import pandas as pd
-from embeddings.embedding_manager import EmbeddingManager
-from embeddings.vector_store import VectorStore
-from embeddings.similarity import find_most_similar, average_embeddings
+from embeddings.embedding_manager import EmbeddingBatchError, EmbeddingManager
+from embeddings.vector_store import VectorStore, content_hash
+from embeddings.normalized_similarity import average_embeddings
+from embeddings.ranking import top_k_indices
+from ai.query_text import create_query_embedding_text
 from catalog.catalog_loader import CatalogLoader
 from recommender.content_filter import ContentFilter
+from recommender.snapshot import CatalogSnapshot, file_signature
+import config
 
 
 class RecommendationEngine:
@@ -25,44 +31,306 @@ class RecommendationEngine:
             embedding_manager: Embedding manager instance
             vector_store: Vector store instance
         """
-        self.catalog = catalog_loader
         self.embedding_manager = embedding_manager
-        self.vector_store = vector_store
-        self.content_filter = ContentFilter(catalog_loader.df)
+        self._snapshot = CatalogSnapshot(catalog_loader, vector_store)
+        self._pinned = threading.local()  # snapshot a thread is working on, see pinned()
+        self._reload_lock = threading.Lock()
+        
+        self.search_mode = config.VECTOR_SEARCH_MODE
+        if self.search_mode not in ('exact', 'ivf'):
+            raise ValueError(f"Unknown VECTOR_SEARCH_MODE: {self.search_mode}")
+    
+    @property
+    def snapshot(self) -> CatalogSnapshot:
+        """Catalog snapshot for the calling thread: the pinned one, else the live one."""
+        return getattr(self._pinned, 'snapshot', None) or self._snapshot
+    
+    @property
+    def catalog(self) -> CatalogLoader:
+        """Catalog of the snapshot in use."""
+        return self.snapshot.catalog
+    
+    @property
+    def vector_store(self) -> VectorStore:
+        """Vector store of the snapshot in use."""
+        return self.snapshot.vector_store
+    
+    @property
+    def content_filter(self) -> ContentFilter:
+        """Content filter of the snapshot in use."""
+        return self.snapshot.content_filter
+    
+    @contextmanager
+    def pinned(self, snapshot: CatalogSnapshot = None):
+        """Serve a block from one snapshot, even if a reload swaps in a newer one.
+        
+        Nested blocks without a snapshot keep the outer one, so a request
+        that pins once sees the same catalog and vectors in every call it
+        makes. An explicit snapshot always applies to its block; the outer
+        one is restored after it.
+        
+        Args:
+            snapshot: Snapshot to pin (defaults to the pinned one, else the live one)
+        
+        Yields:
+            The pinned snapshot
+        """
+        previous = getattr(self._pinned, 'snapshot', None)
+        if snapshot is None and previous is not None:
+            yield previous
+            return
+        
+        self._pinned.snapshot = snapshot or self._snapshot
+        try:
+            yield self._pinned.snapshot
+        finally:
+            self._pinned.snapshot = previous
+    
+    def reload_catalog(self, catalog_path: str = None, background: bool = True) -> Optional[threading.Thread]:
+        """Build a new catalog snapshot and swap it in for new requests.
+        
+        The catalog is loaded, its name indexes and row store built and the
+        vector cache refreshed (same path, storage and reduction as the
+        live store; only new or changed movies are embedded) while the
+        current snapshot keeps serving. Requests already pinned to the old
+        snapshot finish on it. If the build fails, or leaves movies
+        without embeddings, the old snapshot stays live.
+        
+        Args:
+            catalog_path: Catalog file to load (defaults to the current one)
+            background: Build in a daemon thread and return immediately
+        
+        Returns:
+            Build thread if background, else None (also None if a reload
+            is already running)
+        """
+        if not self._reload_lock.acquire(blocking=False):
+            print("[!] Catalog reload already in progress")
+            return None
+        
+        live = self._snapshot
+        path = catalog_path or live.catalog.catalog_path
+        
+        def build():
+            try:
+                catalog = CatalogLoader(path, mode=live.catalog.mode)
+                catalog.load_catalog()
+                store = live.vector_store
+                vector_store = VectorStore(store.cache_path, model_name=store.model_name, storage=store.storage,
+                                           reduced_dimension=store.reduced_dimension)
+                snapshot = CatalogSnapshot(catalog, vector_store, version=live.version + 1)
+                
+                # Everything the engine does in this thread goes to the new snapshot
+                with self.pinned(snapshot):
+                    self.initialize_embeddings()
+                if vector_store.size() != len(catalog.df):
+                    raise ValueError(f"{vector_store.size()} embeddings for {len(catalog.df)} movies")
+                snapshot.warm_up()
+                
+                self._snapshot = snapshot
+                print(f"[+] Catalog snapshot v{snapshot.version} is live ({len(catalog.df)} movies)")
+            except Exception as e:
+                print(f"[!] Catalog reload failed, still serving v{live.version}: {e}")
+            finally:
+                self._reload_lock.release()
+        
+        if not background:
+            build()
+            return None
+        
+        thread = threading.Thread(target=build, name=f"catalog-reload-v{live.version + 1}", daemon=True)
+        thread.start()
+        return thread
+    
+    def reload_if_changed(self, background: bool = True) -> Optional[threading.Thread]:
+        """Reload the catalog if its file changed since the live snapshot was built.
+        
+        Args:
+            background: Build in a daemon thread (see reload_catalog)
+        
+        Returns:
+            Build thread, or None if nothing to reload
+        """
+        live = self._snapshot
+        signature = file_signature(live.catalog.catalog_path)
+        if signature is None or signature == live.source:
+            return None
+        
+        print(f"[i] Catalog file changed, building snapshot v{live.version + 1}...")
+        return self.reload_catalog(background=background)
+    
+    def watch_catalog(self, interval: float = None) -> threading.Event:
+        """Check the catalog file periodically and hot-reload it when it changes.
+        
+        Args:
+            interval: Seconds between checks (defaults to config.CATALOG_WATCH_INTERVAL)
+        
+        Returns:
+            Event to set to stop watching
+        """
+        interval = interval or config.CATALOG_WATCH_INTERVAL
+        if not interval or interval <= 0:
+            raise ValueError(f"Catalog watch interval must be positive, got {interval}")
+        stop = threading.Event()
+        
+        def watch():
+            while not stop.wait(interval):
+                thread = self.reload_if_changed()
+                if thread is not None:
+                    thread.join()
+        
+        threading.Thread(target=watch, name="catalog-watch", daemon=True).start()
+        return stop
     
-    def initialize_embeddings(self, force_refresh: bool = False):
+    def initialize_embeddings(self, force_refresh: bool = False, stream: bool = False):
         """Initialize or load movie embeddings.
         
+        A cached store is checked against the current catalog and only
+        new or changed movies are re-embedded (see refresh_embeddings).
+        
         Args:
-            force_refresh: Force regeneration of embeddings
+            force_refresh: Drop the cache and re-embed the whole catalog
+            stream: Read the catalog file in record batches instead of
+                using the loaded DataFrame (for catalogs too big to load)
         """
         # Try to load from cache first
         if not force_refresh and self.vector_store.load_from_disk():
             print(f"[+] Using cached embeddings ({self.vector_store.size()} movies)")
-            return
+        else:
+            self.vector_store.clear()
+            self.vector_store.discard_checkpoints()
+            print("[i] Generating embeddings for all movies (this may take a while)...")
+        
+        self.refresh_embeddings(self.catalog.iter_batches() if stream else None)
+        
+        if self.search_mode == 'ivf' and self.vector_store.size() > 0:
+            self.vector_store.ensure_ann_index(nlist=config.IVF_NLIST, nprobe=config.IVF_NPROBE)
+    
+    def refresh_embeddings(
+        self,
+        batches: Iterable[pd.DataFrame] = None,
+        trust_untagged: bool = None
+    ) -> Dict[str, int]:
+        """Bring stored embeddings in sync with the catalog.
+        
+        Every stored vector is tagged with a hash of the movie description
+        and the embedding model. Only movies whose hash is missing or
+        different are sent to the embeddings API; movies that left the
+        catalog are dropped. Cached vectors without a hash (caches written
+        before hashes were stored) cannot be checked, so they are
+        re-embedded unless trust_untagged is set.
         
-        print("[i] Generating embeddings for all movies (this may take a while)...")
+        Every completed API batch is checkpointed to disk, so if the run is
+        interrupted, the next one starts after the last committed batch.
+        
+        Args:
+            batches: Catalog as a stream of DataFrame chunks (see
+                CatalogLoader.iter_batches); each chunk is described,
+                embedded and appended before the next one is read.
+                Defaults to the loaded catalog in one piece
+            trust_untagged: Keep cached vectors without a hash and tag them
+                with the current description's hash instead of re-embedding
+                (defaults to config.EMBEDDINGS_TRUST_UNTAGGED)
         
-        # Generate embeddings for all movies
-        movie_descriptions = []
-        movie_indices = []
+        Returns:
+            Counts of 'added', 'updated', 'removed' and 'unchanged' movies,
+            and of movies whose embedding 'failed' (retried on next refresh)
+        """
+        if trust_untagged is None:
+            trust_untagged = config.EMBEDDINGS_TRUST_UNTAGGED
         
-        for idx in self.catalog.df.index:
-            movie = self.catalog.get_movie_by_index(idx)
-            description = self.catalog.create_movie_description(movie)
-            movie_descriptions.append(description)
-            movie_indices.append(idx)
+        store = self.vector_store
+        tagged = 0
+        stats = {'added': 0, 'updated': 0, 'removed': 0, 'unchanged': 0, 'failed': 0}
+        seen = []  # movie ids of every chunk, to find movies that left the catalog
         
-        # Create embeddings in batches
-        embeddings = self.embedding_manager.create_embeddings_batch(movie_descriptions)
+        for chunk in ([self.catalog.df] if batches is None else batches):
+            movie_ids = [int(idx) for idx in chunk.index]
+            seen.append(np.asarray(movie_ids, dtype=np.int64))
+            descriptions = self.catalog.create_movie_descriptions(chunk)
+            tagged += self._refresh_chunk(movie_ids, descriptions, stats, trust_untagged)
         
-        # Store embeddings
-        self.vector_store.add_embeddings_batch(movie_indices, embeddings)
+        stored_ids, _ = store.get_matrix()
+        catalog_ids = np.concatenate(seen) if seen else np.empty(0, dtype=np.int64)
+        stats['removed'] = store.remove_embeddings(stored_ids[~np.isin(stored_ids, catalog_ids)])
         
-        # Save to cache
-        self.vector_store.save_to_disk()
+        if stats['added'] or stats['updated'] or stats['removed'] or tagged:
+            store.save_to_disk()
         
-        print(f"[+] Generated and cached {len(embeddings)} embeddings")
+        failed = f", {stats['failed']} failed" if stats['failed'] else ""
+        print(f"[+] Embeddings refreshed: {stats['added']} added, {stats['updated']} updated, "
+              f"{stats['removed']} removed, {stats['unchanged']} unchanged{failed}")
+        return stats
+    
+    def _refresh_chunk(
+        self,
+        movie_ids: List[int],
+        descriptions: List[str],
+        stats: Dict[str, int],
+        trust_untagged: bool
+    ) -> int:
+        """Embed the new or changed movies of one catalog chunk.
+        
+        Args:
+            movie_ids: Movie indices of the chunk
+            descriptions: Their descriptions
+            stats: Counts to update (see refresh_embeddings)
+            trust_untagged: Tag cached vectors without a hash instead of re-embedding them
+        
+        Returns:
+            Number of cached vectors that got a content hash
+        """
+        store = self.vector_store
+        model = self.embedding_manager.model
+        
+        to_embed, texts, hashes = [], [], []
+        is_new = []  # per movie in to_embed: not stored yet (added) or stale (updated)
+        tagged = 0
+        
+        for idx, description in zip(movie_ids, descriptions):
+            digest = content_hash(description, model)
+            
+            stored_digest = store.content_hashes.get(idx)
+            
+            if not store.has_embedding(idx):
+                is_new.append(True)
+            elif stored_digest is None and trust_untagged:
+                store.content_hashes[idx] = digest
+                tagged += 1
+                stats['unchanged'] += 1
+                continue
+            elif stored_digest != digest:
+                is_new.append(False)
+            else:
+                stats['unchanged'] += 1
+                continue
+            
+            to_embed.append(idx)
+            texts.append(description)
+            hashes.append(digest)
+        
+        if to_embed:
+            print(f"[i] Embedding {len(to_embed)} new or changed movies...")
+            stored = 0
+            
+            # Counted as batches reach the store, so failed batches are not reported as added
+            def checkpoint(start: int, batch_embeddings: List[np.ndarray]):
+                nonlocal stored
+                end = start + len(batch_embeddings)
+                store.checkpoint_batch(to_embed[start:end], batch_embeddings, hashes[start:end])
+                added = sum(is_new[start:end])
+                stats['added'] += added
+                stats['updated'] += len(batch_embeddings) - added
+                stored += len(batch_embeddings)
+            
+            try:
+                self.embedding_manager.create_embeddings_batch(texts, on_batch=checkpoint)
+            except EmbeddingBatchError as e:
+                # Batches that succeeded are already stored; failed movies keep their old hash
+                print(f"[!] {e}, the rest will be retried on next refresh")
+            stats['failed'] += len(to_embed) - stored
+        
+        return tagged
     
     def get_recommendations_by_query(
         self,
@@ -76,7 +344,7 @@ class RecommendationEngine:
             query_text: User query or preferences as text
             top_k: Number of recommendations
             exclude_indices: Movie indices to exclude
-            
+        
         Returns:
             List of (movie_index, similarity_score) tuples
         """
@@ -104,17 +372,57 @@ class RecommendationEngine:
             preferences: Dictionary with user preferences
             top_k: Number of recommendations
             exclude_indices: Movie indices to exclude
-            
+        
         Returns:
             List of (movie_index, similarity_score) tuples
         """
         # Convert preferences to query text
-        from ai.assistant import MovieAssistant
-        assistant = MovieAssistant()
-        query_text = assistant.create_query_embedding_text(preferences)
+        query_text = self.create_preferences_query_text(preferences)
         
         return self.get_recommendations_by_query(query_text, top_k, exclude_indices)
     
+    def create_preferences_query_text(self, preferences: Dict) -> str:
+        """Convert user preferences to query text for embedding.
+        
+        Args:
+            preferences: Dictionary with user preferences
+        
+        Returns:
+            Query text
+        """
+        return create_query_embedding_text(preferences)
+    
+    def create_preferences_embedding(self, preferences: Dict) -> np.ndarray:
+        """Create query embedding for user preferences.
+        
+        Args:
+            preferences: Dictionary with user preferences
+        
+        Returns:
+            Query embedding vector
+        """
+        query_text = self.create_preferences_query_text(preferences)
+        return self.embedding_manager.create_embedding(query_text)
+    
+    def get_liked_centroid(self, liked_movie_indices: List[int]) -> Optional[np.ndarray]:
+        """Get average embedding of movies user liked.
+        
+        Args:
+            liked_movie_indices: Indices of movies user liked
+        
+        Returns:
+            Average embedding or None if no liked movie has an embedding
+        """
+        liked_embeddings = [
+            emb for emb in self.vector_store.get_embeddings(liked_movie_indices or [])
+            if emb is not None
+        ]
+        
+        if not liked_embeddings:
+            return None
+        
+        return average_embeddings(liked_embeddings)
+    
     def get_recommendations_by_liked_movies(
         self,
         liked_movie_indices: List[int],
@@ -127,32 +435,23 @@ class RecommendationEngine:
             liked_movie_indices: Indices of movies user liked
             top_k: Number of recommendations
             exclude_indices: Movie indices to exclude
-            
+        
         Returns:
             List of (movie_index, similarity_score) tuples
         """
-        if not liked_movie_indices:
-            return []
-        
-        # Get embeddings for liked movies
-        liked_embeddings = []
-        for idx in liked_movie_indices:
-            emb = self.vector_store.get_embedding(idx)
-            if emb is not None:
-                liked_embeddings.append(emb)
-        
-        if not liked_embeddings:
-            return []
-        
-        # Calculate average embedding of liked movies
-        avg_embedding = average_embeddings(liked_embeddings)
-        
-        # Search for similar movies
-        results = self.vector_store.search_similar(
-            avg_embedding,
-            top_k=top_k * 2,
-            exclude_indices=exclude_indices
-        )
+        with self.pinned():
+            # Calculate average embedding of liked movies
+            avg_embedding = self.get_liked_centroid(liked_movie_indices)
+            
+            if avg_embedding is None:
+                return []
+            
+            # Search for similar movies
+            results = self.vector_store.search_similar(
+                avg_embedding,
+                top_k=top_k * 2,
+                exclude_indices=exclude_indices
+            )
         
         return results[:top_k]
     
@@ -170,26 +469,49 @@ class RecommendationEngine:
             liked_movie_indices: Movies user liked
             disliked_movie_indices: Movies user disliked
             top_k: Number of recommendations
-            
+        
         Returns:
             List of (movie_index, similarity_score) tuples
         """
         # Combine liked movies and disliked movies for exclusion
         exclude_indices = liked_movie_indices + disliked_movie_indices
         
-        # Get recommendations from both preferences and liked movies
-        pref_recs = self.get_recommendations_by_preferences(
-            preferences,
-            top_k=top_k,
-            exclude_indices=exclude_indices
-        )
+        # Search by preferences and by liked movies in one pass over the catalog
+        queries = [self.create_preferences_embedding(preferences)]
         
-        liked_recs = self.get_recommendations_by_liked_movies(
-            liked_movie_indices,
-            top_k=top_k,
-            exclude_indices=exclude_indices
-        )
+        # Centroid and search from the same snapshot, even if a reload lands in between
+        with self.pinned():
+            liked_centroid = self.get_liked_centroid(liked_movie_indices)
+            if liked_centroid is not None:
+                queries.append(liked_centroid)
+            
+            results = self.vector_store.search_batch(
+                np.vstack(queries),
+                top_k=top_k,
+                exclude_indices=exclude_indices
+            )
+        
+        pref_recs = results[0]
+        liked_recs = results[1] if liked_centroid is not None else []
+        
+        return self.combine_recommendations(pref_recs, liked_recs, top_k)
+    
+    def combine_recommendations(
+        self,
+        pref_recs: List[Tuple[int, float]],
+        liked_recs: List[Tuple[int, float]],
+        top_k: int
+    ) -> List[Tuple[int, float]]:
+        """Merge preference-based and liked-based recommendations.
         
+        Args:
+            pref_recs: Recommendations by preferences
+            liked_recs: Recommendations by liked movies
+            top_k: Number of recommendations
+        
+        Returns:
+            List of (movie_index, combined_score) tuples
+        """
         # Combine and deduplicate
         combined = {}
         
@@ -204,17 +526,19 @@ class RecommendationEngine:
             else:
                 combined[idx] = score * 0.4
         
-        # Sort by combined score
-        results = sorted(combined.items(), key=lambda x: x[1], reverse=True)
+        # Best combined scores first, ties by movie index
+        movie_ids = np.fromiter(combined.keys(), dtype=np.int64, count=len(combined))
+        scores = np.fromiter(combined.values(), dtype=np.float64, count=len(combined))
+        order = top_k_indices(scores, top_k, keys=movie_ids)
         
-        return results[:top_k]
+        return [(int(movie_ids[i]), float(scores[i])) for i in order]
     
     def get_movies_dataframe(self, movie_indices: List[int]) -> pd.DataFrame:
         """Get DataFrame with movie details.
         
         Args:
             movie_indices: List of movie indices
-            
+        
         Returns:
             DataFrame with movie details
         """
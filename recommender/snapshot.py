@@ -0,0 +1,49 @@
+"""Versioned catalog snapshots for hot reload without restarts."""
+import time
+from catalog.catalog_loader import CatalogLoader, file_signature
+from catalog.inverted_index import FUZZY_COLUMNS
+from embeddings.vector_store import VectorStore
+from recommender.content_filter import ContentFilter
+
+
+class CatalogSnapshot:
+    """Everything a request reads, for one version of the catalog.
+    
+    The DataFrame with its row store and name indexes, the content filter
+    over them and the vector store built for the same movies. A snapshot
+    is never modified after it goes live: a reload builds a new one and
+    swaps the reference, so a request holding the old snapshot keeps
+    consistent data until it finishes.
+    """
+    
+    def __init__(self, catalog: CatalogLoader, vector_store: VectorStore, version: int = 1):
+        """Bundle a catalog and its vectors.
+        
+        Args:
+            catalog: Catalog loader (loaded, or empty for offline builds)
+            vector_store: Vector store for the catalog's movies
+            version: Snapshot version, increasing with every reload
+        """
+        self.catalog = catalog
+        self.vector_store = vector_store
+        self.version = version
+        self.content_filter = ContentFilter(catalog.df, catalog.index if catalog.df is not None else None)
+        
+        # Catalog file this snapshot was read from (as it is now, for catalogs not loaded from the file)
+        self.source = catalog.source or file_signature(catalog.catalog_path)
+        self.created_at = time.time()
+    
+    def warm_up(self):
+        """Build lazily computed search structures before the snapshot serves requests.
+        
+        Compressed codes, the PCA projection and the fuzzy name indexes are
+        built on first use; doing it here keeps that cost out of the first
+        requests after a swap.
+        """
+        if self.catalog.df is not None:
+            for column in FUZZY_COLUMNS:
+                self.catalog.index.fuzzy_index(column)
+        
+        if self.vector_store.size() > 0:
+            _, matrix = self.vector_store.get_matrix()
+            self.vector_store.search_batch(matrix[:1], top_k=1)
@@ -0,0 +1,154 @@
+"""Time the recommendation pipeline end to end.
+
+catalog -> vectors -> search -> recommendations, with the embedding
+provider from config or from the command line. With the local provider
+and a synthetic catalog it needs no network and no API key:
+
+    python -m tools.benchmark_pipeline --provider local --synthetic 20000
+"""
+import argparse
+import tempfile
+import time
+import numpy as np
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List
+import config
+
+
+@contextmanager
+def timed(label: str, timings: Dict[str, float]):
+    """Measure wall time of a block and print it."""
+    start = time.perf_counter()
+    yield
+    timings[label] = time.perf_counter() - start
+    print(f"[i] {label}: {timings[label]:.3f}s")
+
+
+def sample_preferences(catalog_df, count: int, seed: int = 0) -> List[Dict]:
+    """Build preference dicts from random catalog rows.
+    
+    Args:
+        catalog_df: Catalog DataFrame
+        count: Number of preference sets
+        seed: Random seed
+    
+    Returns:
+        List of preferences in the format produced by the assistant
+    """
+    rng = np.random.default_rng(seed)
+    rows = catalog_df.iloc[rng.integers(0, len(catalog_df), count)]
+    
+    preferences = []
+    for _, movie in rows.iterrows():
+        prefs = {}
+        if isinstance(movie.get('actors'), str):
+            prefs['actors'] = [movie['actors'].split(',')[0].strip()]
+        if isinstance(movie.get('genres'), str):
+            prefs['genres'] = [g.strip() for g in movie['genres'].split(',')][:2]
+        if rng.random() < 0.3 and isinstance(movie.get('director'), str):
+            prefs['directors'] = [movie['director'].split(',')[0].strip()]
+        preferences.append(prefs)
+    return preferences
+
+
+def percentiles(samples: List[float]) -> str:
+    """Format p50 / p95 / max of latency samples in milliseconds."""
+    values = np.asarray(samples) * 1000
+    return (f"p50={np.percentile(values, 50):.2f}ms p95={np.percentile(values, 95):.2f}ms "
+            f"max={values.max():.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the recommendation pipeline")
+    parser.add_argument('--provider', choices=['openai', 'local'], default=config.EMBEDDING_PROVIDER)
+    parser.add_argument('--catalog', default=config.CATALOG_PATH, help="Parquet catalog to load")
+    parser.add_argument('--catalog-mode', choices=['full', 'search'], default=config.CATALOG_LOAD_MODE)
+    parser.add_argument('--synthetic', type=int, default=0, help="Use a synthetic catalog of N movies instead")
+    parser.add_argument('--queries', type=int, default=200, help="Number of preference queries")
+    parser.add_argument('--top-k', type=int, default=config.FINAL_RECOMMENDATIONS_COUNT)
+    parser.add_argument('--search-mode', choices=['exact', 'ivf'], default=config.VECTOR_SEARCH_MODE)
+    parser.add_argument('--storage', choices=['float32', 'float16', 'int8'], default=config.EMBEDDING_STORAGE)
+    parser.add_argument('--work-dir', default=None, help="Directory for caches (default: temporary)")
+    args = parser.parse_args()
+    
+    work_dir = Path(args.work_dir or tempfile.mkdtemp(prefix="vibe-bench-"))
+    work_dir.mkdir(parents=True, exist_ok=True)
+    
+    # Point every cache at the work dir so the real ones are never touched
+    config.EMBEDDING_PROVIDER = args.provider
+    config.VECTOR_SEARCH_MODE = args.search_mode
+    config.EMBEDDING_STORAGE = args.storage
+    config.EMBEDDINGS_CACHE_PATH = str(work_dir / "embeddings_cache.json")
+    config.LEGACY_EMBEDDINGS_CACHE_PATH = str(work_dir / "embeddings_cache.pkl")
+    config.QUERY_CACHE_PATH = None
+    
+    from catalog.catalog_loader import CatalogLoader
+    from embeddings.embedding_manager import EmbeddingManager
+    from embeddings.vector_store import VectorStore
+    from recommender.recommendation_engine import RecommendationEngine
+    from recommender.collaborative_session import CollaborativeSession
+    
+    timings: Dict[str, float] = {}
+    print(f"[i] Provider: {args.provider}, search: {args.search_mode}, storage: {args.storage}, work dir: {work_dir}")
+    
+    with timed("catalog load", timings):
+        catalog = CatalogLoader(args.catalog, mode=args.catalog_mode)
+        if args.synthetic:
+            from tools.synthetic_catalog import make_synthetic_catalog
+            catalog.df = make_synthetic_catalog(args.synthetic)
+        else:
+            catalog.load_catalog()
+    
+    embedding_manager = EmbeddingManager()
+    engine = RecommendationEngine(catalog, embedding_manager, VectorStore())
+    
+    with timed("embedding build", timings):
+        engine.initialize_embeddings(force_refresh=True)
+    
+    with timed("cache reload", timings):
+        engine = RecommendationEngine(catalog, embedding_manager, VectorStore())
+        engine.initialize_embeddings()
+    
+    preferences = sample_preferences(catalog.df, args.queries)
+    
+    query_latency = []
+    with timed(f"{args.queries} preference queries", timings):
+        for prefs in preferences:
+            start = time.perf_counter()
+            engine.get_recommendations_by_preferences(prefs, top_k=args.top_k)
+            query_latency.append(time.perf_counter() - start)
+    print(f"[i]   per query: {percentiles(query_latency)}")
+    
+    queries = np.vstack([engine.create_preferences_embedding(prefs) for prefs in preferences])
+    with timed(f"{args.queries} queries as one search_batch", timings):
+        engine.vector_store.search_batch(queries, top_k=args.top_k)
+    
+    rng = np.random.default_rng(1)
+    movie_ids = catalog.df.index.to_numpy()
+    
+    refine_latency = []
+    with timed("refine_recommendations", timings):
+        for prefs in preferences:
+            liked = rng.choice(movie_ids, 3, replace=False).tolist()
+            disliked = rng.choice(movie_ids, 2, replace=False).tolist()
+            start = time.perf_counter()
+            engine.refine_recommendations(prefs, liked, disliked, top_k=args.top_k)
+            refine_latency.append(time.perf_counter() - start)
+    print(f"[i]   per call: {percentiles(refine_latency)}")
+    
+    session = CollaborativeSession(engine)
+    duo_latency = []
+    with timed("collaborative recommendations", timings):
+        for prefs1, prefs2 in zip(preferences[::2], preferences[1::2]):
+            liked1, liked2 = (rng.choice(movie_ids, 3, replace=False).tolist() for _ in range(2))
+            start = time.perf_counter()
+            session.get_collaborative_recommendations(prefs1, prefs2, liked1, liked2, total_count=args.top_k)
+            duo_latency.append(time.perf_counter() - start)
+    print(f"[i]   per call: {percentiles(duo_latency)}")
+    
+    print("[+] Done:", ", ".join(f"{label}={seconds:.2f}s" for label, seconds in timings.items()))
+
+
+if __name__ == '__main__':
+    main()
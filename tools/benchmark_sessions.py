@@ -0,0 +1,194 @@
+"""Throughput of concurrent single and duo sessions against the stub OpenAI API.
+
+Starts tools.stub_openai_server in-process (or uses --base-url), builds the
+catalog embeddings through it and then runs N simulated sessions on a
+thread pool, the way concurrent web requests hit the shared engine:
+
+    python -m tools.benchmark_sessions --synthetic 5000 --single 200 --duo 100 --concurrency 32
+
+Reports throughput and latency percentiles per stage (chat turns,
+preference extraction, search, refinement, collaborative ranking).
+"""
+import argparse
+import random
+import tempfile
+import threading
+import time
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List
+from tools.benchmark_pipeline import sample_preferences
+from tools.stub_openai_server import add_stub_arguments, server_from_args
+import config
+
+
+class StageTimes:
+    """Thread-safe latency samples per stage."""
+    
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+    
+    @contextmanager
+    def stage(self, name: str):
+        """Time a block as one sample of a stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.samples.setdefault(name, []).append(elapsed)
+    
+    def report(self, wall_time: float):
+        """Print count, throughput and latency percentiles per stage."""
+        print(f"\n{'stage':<26}{'count':>7}{'per s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+        for name, samples in self.samples.items():
+            ms = np.asarray(samples) * 1000
+            p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+            print(f"{name:<26}{len(ms):>7}{len(ms) / wall_time:>9.1f}{p50:>10.1f}{p95:>10.1f}{p99:>10.1f}{ms.max():>10.1f}")
+
+
+def user_messages(preferences: Dict) -> List[str]:
+    """Turn sampled preferences into what a user would type."""
+    messages = []
+    if preferences.get('actors'):
+        messages.append(f"Хочу фильм с {', '.join(preferences['actors'])}")
+    if preferences.get('directors'):
+        messages.append(f"Люблю режиссера {', '.join(preferences['directors'])}")
+    if preferences.get('genres'):
+        messages.append(f"Жанры: {', '.join(preferences['genres'])}")
+    return messages or ["Что-нибудь интересное на вечер"]
+
+
+def run_single(engine, preferences: Dict, times: StageTimes, top_k: int):
+    """One user: chat, extract preferences, search, rate, refine."""
+    from ai.assistant import MovieAssistant
+    
+    with times.stage("single session"):
+        assistant = MovieAssistant()
+        for message in user_messages(preferences):
+            with times.stage("chat turn"):
+                assistant.send_message(message)
+        
+        with times.stage("extract preferences"):
+            extracted = assistant.extract_preferences() or preferences
+        
+        with times.stage("recommend"):
+            recommendations = engine.get_recommendations_by_preferences(extracted, top_k=top_k)
+        
+        movie_ids = [idx for idx, _ in recommendations]
+        liked, disliked = movie_ids[:3], movie_ids[3:5]
+        
+        with times.stage("refine"):
+            engine.refine_recommendations(extracted, liked, disliked, top_k=top_k)
+        
+        with times.stage("analyze ratings"):
+            assistant.analyze_ratings(
+                engine.get_movies_dataframe(liked).to_dict('records'),
+                engine.get_movies_dataframe(disliked).to_dict('records')
+            )
+
+
+def run_duo(session, preferences1: Dict, preferences2: Dict, times: StageTimes, top_k: int):
+    """Two users: both chat and extract, then collaborative recommendations."""
+    from ai.assistant import MovieAssistant
+    
+    with times.stage("duo session"):
+        extracted = []
+        for preferences in (preferences1, preferences2):
+            assistant = MovieAssistant()
+            for message in user_messages(preferences):
+                with times.stage("chat turn"):
+                    assistant.send_message(message)
+            with times.stage("extract preferences"):
+                extracted.append(assistant.extract_preferences() or preferences)
+        
+        engine = session.engine
+        liked = [[idx for idx, _ in engine.get_recommendations_by_preferences(prefs, top_k=3)] for prefs in extracted]
+        
+        with times.stage("collaborative"):
+            session.get_collaborative_recommendations(extracted[0], extracted[1], liked[0], liked[1], total_count=top_k)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark concurrent sessions against a stub OpenAI API")
+    parser.add_argument('--base-url', default=None, help="Use a running stub instead of starting one")
+    parser.add_argument('--catalog', default=config.CATALOG_PATH, help="Parquet catalog to load")
+    parser.add_argument('--synthetic', type=int, default=0, help="Use a synthetic catalog of N movies instead")
+    parser.add_argument('--single', type=int, default=100, help="Number of single sessions")
+    parser.add_argument('--duo', type=int, default=50, help="Number of duo sessions")
+    parser.add_argument('--concurrency', type=int, default=16, help="Sessions in flight at once")
+    parser.add_argument('--top-k', type=int, default=config.FINAL_RECOMMENDATIONS_COUNT)
+    parser.add_argument('--work-dir', default=None, help="Directory for caches (default: temporary)")
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+    
+    server = None
+    if args.base_url is None:
+        server = server_from_args(args).start()
+        print(f"[+] Stub OpenAI API at {server.base_url}")
+    
+    work_dir = Path(args.work_dir or tempfile.mkdtemp(prefix="vibe-sessions-"))
+    work_dir.mkdir(parents=True, exist_ok=True)
+    
+    # Everything goes to the stub; caches live in the work dir
+    config.OPENAI_BASE_URL = args.base_url or server.base_url
+    config.OPENAI_API_KEY = config.OPENAI_API_KEY or "stub"
+    config.EMBEDDING_PROVIDER = 'openai'
+    config.EMBEDDINGS_CACHE_PATH = str(work_dir / "embeddings_cache.json")
+    config.LEGACY_EMBEDDINGS_CACHE_PATH = str(work_dir / "embeddings_cache.pkl")
+    config.QUERY_CACHE_PATH = None
+    
+    from catalog.catalog_loader import CatalogLoader
+    from embeddings.embedding_manager import EmbeddingManager
+    from embeddings.vector_store import VectorStore
+    from recommender.recommendation_engine import RecommendationEngine
+    from recommender.collaborative_session import CollaborativeSession
+    
+    catalog = CatalogLoader(args.catalog)
+    if args.synthetic:
+        from tools.synthetic_catalog import make_synthetic_catalog
+        catalog.df = make_synthetic_catalog(args.synthetic)
+    else:
+        catalog.load_catalog()
+    
+    engine = RecommendationEngine(catalog, EmbeddingManager(), VectorStore())
+    
+    start = time.perf_counter()
+    engine.initialize_embeddings(force_refresh=True)
+    build_time = time.perf_counter() - start
+    print(f"[i] Embedding build: {build_time:.2f}s ({len(catalog.df) / build_time:.0f} movies/s)")
+    
+    session = CollaborativeSession(engine)
+    preferences = sample_preferences(catalog.df, args.single + 2 * args.duo)
+    
+    jobs = [(run_single, (engine, preferences[i])) for i in range(args.single)]
+    jobs += [(run_duo, (session, preferences[args.single + 2 * i], preferences[args.single + 2 * i + 1]))
+             for i in range(args.duo)]
+    random.Random(0).shuffle(jobs)
+    
+    times = StageTimes()
+    print(f"[i] Running {args.single} single + {args.duo} duo sessions, concurrency {args.concurrency}...")
+    
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        futures = [pool.submit(job, *job_args, times, args.top_k) for job, job_args in jobs]
+        failed = sum(1 for future in futures if future.exception() is not None)
+    wall_time = time.perf_counter() - start
+    
+    times.report(wall_time)
+    print(f"\n[+] {len(jobs) - failed} sessions in {wall_time:.2f}s ({(len(jobs) - failed) / wall_time:.1f} sessions/s)")
+    if failed:
+        print(f"[!] {failed} sessions failed: {next(f.exception() for f in futures if f.exception() is not None)!r}")
+    
+    if server is not None:
+        print(f"[i] Stub served {server.requests}, {server.embedded_inputs} texts embedded, "
+              f"{server.errors} injected errors")
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""Build or refresh the embeddings cache of a catalog file.
+
+With --stream the catalog is never loaded whole: the parquet file is read
+in record batches and every batch is described, embedded and appended to
+the vector store before the next one is read, so a worker with little
+memory can ingest a catalog of any size:
+    
+    python -m tools.build_embeddings --catalog catalog_okko.parquet --stream --batch-rows 4096
+
+Prints the peak resident memory of the run, to compare with a full load
+(on Unix; the resource module is not available on Windows).
+"""
+import argparse
+import sys
+import time
+from typing import Optional
+import config
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Get peak resident memory of this process in MB, or None where it is not available."""
+    if resource is None:
+        return None
+    
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == 'darwin' else peak / 2**10  # bytes on macOS, KB elsewhere
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or refresh the embeddings cache of a catalog")
+    parser.add_argument('--catalog', default=config.CATALOG_PATH, help="Parquet catalog to ingest")
+    parser.add_argument('--provider', choices=['openai', 'local'], default=config.EMBEDDING_PROVIDER)
+    parser.add_argument('--cache', default=config.EMBEDDINGS_CACHE_PATH, help="Embeddings cache to write")
+    parser.add_argument('--stream', action='store_true', help="Read the catalog in record batches")
+    parser.add_argument('--batch-rows', type=int, default=config.CATALOG_STREAM_BATCH_ROWS,
+                        help="Rows per record batch with --stream")
+    parser.add_argument('--force', action='store_true', help="Drop the cache and re-embed everything")
+    args = parser.parse_args()
+    
+    config.EMBEDDING_PROVIDER = args.provider
+    config.EMBEDDINGS_CACHE_PATH = args.cache
+    config.CATALOG_STREAM_BATCH_ROWS = args.batch_rows
+    
+    from catalog.catalog_loader import CatalogLoader
+    from embeddings.embedding_manager import EmbeddingManager
+    from embeddings.vector_store import VectorStore
+    from recommender.recommendation_engine import RecommendationEngine
+    
+    catalog = CatalogLoader(args.catalog)
+    if not args.stream:
+        catalog.load_catalog()
+    
+    engine = RecommendationEngine(catalog, EmbeddingManager(), VectorStore())
+    
+    start = time.perf_counter()
+    engine.initialize_embeddings(force_refresh=args.force, stream=args.stream)
+    elapsed = time.perf_counter() - start
+    
+    mode = f"streamed in batches of {args.batch_rows}" if args.stream else "loaded whole"
+    peak = peak_rss_mb()
+    memory = f", peak memory {peak:.0f} MB" if peak is not None else ""
+    print(f"[+] {engine.vector_store.size()} movies in {args.cache} ({mode}): {elapsed:.2f}s{memory}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+"""Recall@k and latency of reduced-dimension search against full dimension.
+
+Compares, for every target dimension, truncation (first d components,
+re-normalized - what the `dimensions` parameter of text-embedding-3
+returns) and the PCA projection VectorStore uses in 'pca' mode. Queries
+are catalog movies ("more like this"), the movie itself is excluded.
+
+    python -m tools.recall_at_k --dims 128,256,512
+    python -m tools.recall_at_k --synthetic 20000 --dims 64,128,256
+"""
+import argparse
+import tempfile
+import time
+import numpy as np
+from pathlib import Path
+from typing import Dict, List, Set, Tuple
+from tools.benchmark_pipeline import percentiles
+import config
+
+
+def load_vectors(args) -> Tuple[np.ndarray, np.ndarray]:
+    """Get full-dimension catalog vectors from the cache or a synthetic build.
+    
+    Returns:
+        Tuple of (movie indices, normalized matrix)
+    """
+    from embeddings.vector_store import VectorStore
+    
+    if not args.synthetic:
+        store = VectorStore(args.cache, reduced_dimension=None)
+        if not store.load_from_disk():
+            raise SystemExit(f"[!] No embeddings cache at {args.cache}, build it first or use --synthetic")
+        ids, matrix = store.get_matrix()
+        return ids, np.asarray(matrix)
+    
+    from catalog.catalog_loader import CatalogLoader
+    from embeddings.embedding_manager import EmbeddingManager
+    from recommender.recommendation_engine import RecommendationEngine
+    from tools.synthetic_catalog import make_synthetic_catalog
+    
+    config.EMBEDDING_PROVIDER = args.provider
+    config.QUERY_CACHE_PATH = None
+    
+    catalog = CatalogLoader()
+    catalog.df = make_synthetic_catalog(args.synthetic)
+    
+    cache_path = str(Path(args.work_dir) / "embeddings_cache.json")
+    engine = RecommendationEngine(catalog, EmbeddingManager(), VectorStore(cache_path, reduced_dimension=None))
+    engine.initialize_embeddings()
+    
+    ids, matrix = engine.vector_store.get_matrix()
+    return ids, np.asarray(matrix)
+
+
+def run_queries(store, queries: np.ndarray, query_ids: np.ndarray, k: int) -> Tuple[List[Set[int]], List[float]]:
+    """Search every query one by one, dropping the query movie itself.
+    
+    Returns:
+        Tuple of (result id sets, per-query latencies in seconds)
+    """
+    results, latency = [], []
+    for query, query_id in zip(queries, query_ids):
+        start = time.perf_counter()
+        found = store.search_similar(query, top_k=k + 1)
+        latency.append(time.perf_counter() - start)
+        results.append(set([idx for idx, _ in found if idx != query_id][:k]))
+    return results, latency
+
+
+def recall(results: List[Set[int]], truth: List[Set[int]], k: int) -> float:
+    """Mean share of the true top-k found by the reduced search."""
+    return float(np.mean([len(found & expected) / k for found, expected in zip(results, truth)]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall@k of reduced-dimension search")
+    parser.add_argument('--cache', default=config.EMBEDDINGS_CACHE_PATH, help="Embeddings cache to evaluate")
+    parser.add_argument('--synthetic', type=int, default=0, help="Embed a synthetic catalog of N movies instead")
+    parser.add_argument('--provider', choices=['openai', 'local'], default='local', help="Provider for --synthetic")
+    parser.add_argument('--dims', default="64,128,256,512", help="Comma-separated target dimensions")
+    parser.add_argument('--methods', default="truncate,pca", help="Comma-separated: truncate, pca")
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--work-dir', default=None, help="Directory for caches (default: temporary)")
+    args = parser.parse_args()
+    
+    args.work_dir = args.work_dir or tempfile.mkdtemp(prefix="vibe-recall-")
+    Path(args.work_dir).mkdir(parents=True, exist_ok=True)
+    
+    from embeddings.normalized_similarity import normalize_embeddings
+    from embeddings.vector_store import VectorStore
+    
+    ids, matrix = load_vectors(args)
+    full_dimension = matrix.shape[1]
+    print(f"[i] {len(ids)} vectors, {full_dimension} dims, k={args.k}, {args.queries} queries")
+    
+    rng = np.random.default_rng(0)
+    picks = rng.choice(len(ids), min(args.queries, len(ids)), replace=False)
+    queries, query_ids = matrix[picks], ids[picks]
+    
+    def make_store(vectors: np.ndarray, name: str, reduced_dimension: int = None) -> VectorStore:
+        store = VectorStore(str(Path(args.work_dir) / f"{name}.json"), model_name=name,
+                            storage='float32', reduced_dimension=reduced_dimension)
+        store.add_embeddings_batch(ids.tolist(), vectors)
+        return store
+    
+    full_store = make_store(matrix, "full")
+    truth, full_latency = run_queries(full_store, queries, query_ids, args.k)
+    print(f"[i] full ({full_dimension}d): {percentiles(full_latency)}")
+    
+    rows: List[Dict] = []
+    for dimension in (int(d) for d in args.dims.split(',')):
+        if dimension >= full_dimension:
+            print(f"[!] Skipping {dimension}: not below {full_dimension}")
+            continue
+        
+        for method in args.methods.split(','):
+            if method == 'truncate':
+                store = make_store(normalize_embeddings(matrix[:, :dimension]), f"truncate-{dimension}")
+                method_queries = normalize_embeddings(queries[:, :dimension])
+            elif method == 'pca':
+                store = make_store(matrix, f"pca-{dimension}", reduced_dimension=dimension)
+                store.search_similar(queries[0], top_k=1)  # fit the projection outside the timing
+                method_queries = queries
+            else:
+                raise SystemExit(f"[!] Unknown method: {method}")
+            
+            results, latency = run_queries(store, method_queries, query_ids, args.k)
+            rows.append({'method': method, 'dims': dimension, 'recall': recall(results, truth, args.k),
+                         'p50': np.percentile(latency, 50) * 1000})
+            print(f"[i] {method} {dimension}d: recall@{args.k}={rows[-1]['recall']:.3f}, {percentiles(latency)}")
+    
+    print(f"\n{'method':<10}{'dims':>6}{'recall@' + str(args.k):>12}{'p50 ms':>10}")
+    print(f"{'full':<10}{full_dimension:>6}{1.0:>12.3f}{np.percentile(full_latency, 50) * 1000:>10.2f}")
+    for row in rows:
+        print(f"{row['method']:<10}{row['dims']:>6}{row['recall']:>12.3f}{row['p50']:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,313 @@
+"""Local stand-in for the OpenAI API: /v1/embeddings and /v1/chat/completions.
+
+Responses have the shapes the openai client expects, with configurable
+latency and injected errors, so EmbeddingManager and MovieAssistant can be
+load-tested without network or API key:
+
+    python -m tools.stub_openai_server --port 8100 --embedding-latency lognormal:80,0.4 --error-rate 0.02
+    OPENAI_BASE_URL=http://127.0.0.1:8100/v1 OPENAI_API_KEY=stub python main.py
+
+Embeddings come from LocalNgramProvider, so similar texts still get
+similar vectors. Chat requests asking for JSON get a preferences object
+built from the user's messages; others get a canned question.
+"""
+import argparse
+import base64
+import json
+import random
+import threading
+import time
+import numpy as np
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+from embeddings.providers import LocalNgramProvider
+from embeddings.token_budget import estimate_tokens
+import config
+
+
+CHAT_REPLIES = [
+    "Понял! А какое настроение у тебя сейчас: что-то легкое или серьезное?",
+    "Отлично! Есть любимые актеры или режиссеры?",
+    "Интересно! Предпочитаешь новинки или классику?",
+]
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """Parse a latency distribution spec.
+    
+    Args:
+        spec: 'fixed:MS', 'uniform:LO,HI' or 'lognormal:MEDIAN,SIGMA'
+            (milliseconds); a bare number means fixed
+    
+    Returns:
+        Function drawing a delay in seconds from a random generator
+    """
+    kind, _, params = spec.partition(':')
+    if not params:
+        kind, params = 'fixed', kind
+    values = [float(v) for v in params.split(',')]
+    
+    if kind == 'fixed' and len(values) == 1:
+        return lambda rng: values[0] / 1000
+    if kind == 'uniform' and len(values) == 2:
+        return lambda rng: rng.uniform(values[0], values[1]) / 1000
+    if kind == 'lognormal' and len(values) == 2:
+        return lambda rng: rng.lognormvariate(np.log(values[0]), values[1]) / 1000
+    
+    raise ValueError(f"Bad latency spec: {spec} (expected fixed:MS, uniform:LO,HI or lognormal:MEDIAN,SIGMA)")
+
+
+class StubOpenAIServer:
+    """Threaded HTTP server imitating the OpenAI endpoints used by the app."""
+    
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        embedding_latency: str = "fixed:0",
+        embedding_per_input_ms: float = 0.0,
+        chat_latency: str = "fixed:0",
+        error_rate: float = 0.0,
+        error_statuses: List[int] = None,
+        retry_after_ms: Optional[int] = None,
+        seed: int = 0
+    ):
+        """Initialize server (call start() to serve).
+        
+        Args:
+            host: Interface to bind
+            port: Port to bind (0 - any free port)
+            embedding_latency: Base delay of an embeddings request (see parse_latency)
+            embedding_per_input_ms: Extra delay per input text
+            chat_latency: Delay of a chat completion (see parse_latency)
+            error_rate: Share of requests answered with an error
+            error_statuses: HTTP statuses to pick errors from (default 429, 500)
+            retry_after_ms: retry-after-ms header sent with errors (None - not sent)
+            seed: Random seed for latency and errors
+        """
+        self.embedding_latency = parse_latency(embedding_latency)
+        self.embedding_per_input_ms = embedding_per_input_ms
+        self.chat_latency = parse_latency(chat_latency)
+        self.error_rate = error_rate
+        self.error_statuses = error_statuses or [429, 500]
+        self.retry_after_ms = retry_after_ms
+        
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._providers: Dict[int, LocalNgramProvider] = {}  # dimension -> provider
+        
+        # Counters for reports
+        self.requests: Dict[str, int] = {'embeddings': 0, 'chat': 0}
+        self.errors = 0
+        self.embedded_inputs = 0
+        
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+    
+    @property
+    def base_url(self) -> str:
+        """Base URL to pass to the openai client (config.OPENAI_BASE_URL)."""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+    
+    def start(self) -> 'StubOpenAIServer':
+        """Serve in a background thread."""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="stub-openai", daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        """Stop serving and close the socket."""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+    
+    def serve_forever(self):
+        """Serve in the calling thread."""
+        self._httpd.serve_forever()
+    
+    def _draw(self, latency: Callable[[random.Random], float]) -> Tuple[float, Optional[int]]:
+        """Draw a delay and whether to fail, under the lock (shared generator).
+        
+        Returns:
+            Tuple of (delay in seconds, error status or None)
+        """
+        with self._lock:
+            delay = latency(self._rng)
+            status = self._rng.choice(self.error_statuses) if self._rng.random() < self.error_rate else None
+            if status is not None:
+                self.errors += 1
+        return delay, status
+    
+    def _provider(self, dimension: int) -> LocalNgramProvider:
+        """Get embedding model of a dimension (created once)."""
+        with self._lock:
+            if dimension not in self._providers:
+                self._providers[dimension] = LocalNgramProvider(dimension=dimension)
+            return self._providers[dimension]
+    
+    def embeddings(self, body: Dict) -> Dict:
+        """Build an embeddings response.
+        
+        Args:
+            body: Request JSON (model, input, optional dimensions / encoding_format)
+        
+        Returns:
+            Response JSON
+        """
+        texts = body['input'] if isinstance(body['input'], list) else [body['input']]
+        vectors = self._provider(body.get('dimensions') or config.EMBEDDING_DIMENSION).embed(texts)
+        
+        # The openai client asks for base64 (packed little-endian float32) by default
+        if body.get('encoding_format') == 'base64':
+            encoded = [base64.b64encode(np.asarray(v, dtype='<f4').tobytes()).decode('ascii') for v in vectors]
+        else:
+            encoded = [v.tolist() for v in vectors]
+        
+        tokens = sum(estimate_tokens(text, body['model']) for text in texts)
+        return {
+            'object': 'list',
+            'data': [{'object': 'embedding', 'index': i, 'embedding': e} for i, e in enumerate(encoded)],
+            'model': body['model'],
+            'usage': {'prompt_tokens': tokens, 'total_tokens': tokens}
+        }
+    
+    def chat_completion(self, body: Dict) -> Dict:
+        """Build a chat completion response.
+        
+        Args:
+            body: Request JSON (model, messages)
+        
+        Returns:
+            Response JSON
+        """
+        messages = body['messages']
+        user_text = " ".join(m['content'] for m in messages if m['role'] == 'user')
+        
+        if any('JSON' in m['content'] for m in messages):
+            # Preference extraction: hand the user's own words back as free-form preferences
+            content = json.dumps({'other': user_text[-500:]}, ensure_ascii=False)
+        else:
+            content = CHAT_REPLIES[len(messages) % len(CHAT_REPLIES)]
+        
+        prompt_tokens = estimate_tokens(" ".join(m['content'] for m in messages), body['model'])
+        completion_tokens = estimate_tokens(content, body['model'])
+        return {
+            'id': f"chatcmpl-stub-{self.requests['chat']}",
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': body['model'],
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': content},
+                'finish_reason': 'stop',
+                'logprobs': None
+            }],
+            'usage': {
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': completion_tokens,
+                'total_tokens': prompt_tokens + completion_tokens
+            }
+        }
+    
+    def _handler_class(self):
+        """Build request handler bound to this server."""
+        stub = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # keep-alive, like the real API
+            
+            def log_message(self, format, *args):
+                pass
+            
+            def _reply(self, status: int, payload: Dict, headers: Dict[str, str] = None):
+                data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+            
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+                
+                if self.path.endswith('/embeddings'):
+                    kind, handle = 'embeddings', stub.embeddings
+                    delay, status = stub._draw(stub.embedding_latency)
+                    inputs = body.get('input')
+                    delay += stub.embedding_per_input_ms * (len(inputs) if isinstance(inputs, list) else 1) / 1000
+                elif self.path.endswith('/chat/completions'):
+                    kind, handle = 'chat', stub.chat_completion
+                    delay, status = stub._draw(stub.chat_latency)
+                else:
+                    self._reply(404, {'error': {'message': f"Unknown path {self.path}", 'type': 'invalid_request_error'}})
+                    return
+                
+                with stub._lock:
+                    stub.requests[kind] += 1
+                time.sleep(delay)
+                
+                if status is not None:
+                    headers = {} if stub.retry_after_ms is None else {'retry-after-ms': str(stub.retry_after_ms)}
+                    error_type = 'rate_limit_exceeded' if status == 429 else 'server_error'
+                    self._reply(status, {'error': {'message': f"Injected {status}", 'type': error_type}}, headers)
+                    return
+                
+                try:
+                    payload = handle(body)
+                except (KeyError, TypeError, ValueError) as e:
+                    self._reply(400, {'error': {'message': f"Bad request: {e}", 'type': 'invalid_request_error'}})
+                    return
+                
+                if kind == 'embeddings':
+                    with stub._lock:
+                        stub.embedded_inputs += len(payload['data'])
+                self._reply(200, payload)
+        
+        return Handler
+
+
+def add_stub_arguments(parser: argparse.ArgumentParser):
+    """Add stub latency / error options to a command line parser."""
+    parser.add_argument('--embedding-latency', default="lognormal:60,0.4",
+                        help="Embeddings delay: fixed:MS, uniform:LO,HI or lognormal:MEDIAN,SIGMA")
+    parser.add_argument('--embedding-per-input-ms', type=float, default=0.05, help="Extra delay per input text")
+    parser.add_argument('--chat-latency', default="lognormal:400,0.5", help="Chat completion delay (same format)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Share of requests failed with an error")
+    parser.add_argument('--error-statuses', default="429,500", help="Comma-separated HTTP statuses to inject")
+    parser.add_argument('--retry-after-ms', type=int, default=None, help="retry-after-ms header sent with errors")
+
+
+def server_from_args(args, host: str = "127.0.0.1", port: int = 0) -> StubOpenAIServer:
+    """Create stub server from parsed add_stub_arguments options."""
+    return StubOpenAIServer(
+        host=host,
+        port=port,
+        embedding_latency=args.embedding_latency,
+        embedding_per_input_ms=args.embedding_per_input_ms,
+        chat_latency=args.chat_latency,
+        error_rate=args.error_rate,
+        error_statuses=[int(s) for s in args.error_statuses.split(',')],
+        retry_after_ms=args.retry_after_ms
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the OpenAI API")
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=8100)
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+    
+    server = server_from_args(args, host=args.host, port=args.port)
+    print(f"[+] Stub OpenAI API at {server.base_url} (OPENAI_BASE_URL={server.base_url})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n[i] Served {server.requests}, injected errors: {server.errors}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""Synthetic catalog with the columns of catalog_okko.parquet."""
+import numpy as np
+import pandas as pd
+
+
+GENRES = ['драма', 'комедия', 'триллер', 'ужасы', 'фантастика', 'мелодрама', 'боевик',
+          'детектив', 'приключения', 'мультфильм', 'документальный', 'криминал']
+COUNTRIES = ['Россия', 'США', 'Франция', 'Великобритания', 'Германия', 'Япония', 'Корея Южная']
+FIRST_NAMES = ['Анна', 'Иван', 'Мария', 'Дмитрий', 'Ольга', 'Сергей', 'Елена', 'Алексей',
+               'Райан', 'Эмма', 'Том', 'Марго', 'Киану', 'Леонардо', 'Кристофер', 'Дени']
+LAST_NAMES = ['Иванов', 'Петрова', 'Смирнов', 'Кузнецова', 'Гослинг', 'Стоун', 'Харди',
+              'Робби', 'Ривз', 'ДиКаприо', 'Нолан', 'Вильнёв', 'Михалков', 'Бондарчук']
+WORDS = ['история', 'любовь', 'город', 'тайна', 'семья', 'война', 'дорога', 'мечта', 'прошлое',
+         'друзья', 'опасность', 'побег', 'герой', 'море', 'космос', 'ночь', 'деньги', 'месть']
+
+
+def make_synthetic_catalog(n_movies: int, seed: int = 0) -> pd.DataFrame:
+    """Generate a random catalog for benchmarks and offline runs.
+    
+    Args:
+        n_movies: Number of rows
+        seed: Random seed
+    
+    Returns:
+        DataFrame with catalog columns (some values missing, like the real data)
+    """
+    rng = np.random.default_rng(seed)
+    
+    def people(count: int) -> str:
+        return ', '.join(f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}" for _ in range(count))
+    
+    rows = []
+    for i in range(n_movies):
+        rows.append({
+            'serial_name': f"{rng.choice(WORDS).capitalize()} {i}",
+            'genres': ', '.join(rng.choice(GENRES, size=rng.integers(1, 4), replace=False)),
+            'content_type': 'film' if rng.random() < 0.8 else 'serial',
+            'country': rng.choice(COUNTRIES) if rng.random() < 0.9 else None,
+            'actors': people(int(rng.integers(2, 6))) if rng.random() < 0.95 else None,
+            'director': people(1) if rng.random() < 0.9 else None,
+            'age_rating': float(rng.choice([0, 6, 12, 16, 18])),
+            'studio_name': None,
+            'release_date': f"{rng.integers(1960, 2025)}-01-01",
+            'description': ' '.join(rng.choice(WORDS, size=rng.integers(10, 60))).capitalize(),
+            'url': f"https://okko.tv/movie/{i}"
+        })
+    
+    return pd.DataFrame(rows)